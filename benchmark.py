@@ -0,0 +1,351 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+'''
+Benchmarks for the calculations in main.py. The benchmarks run on synthetic
+PDB files so they do not need an internet connection or the GUI.
+
+$ python3 benchmark.py
+'''
+
+import gzip
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+import main
+
+
+def synthetic_pdb(n_atoms, seed=0):
+    '''
+    Function to build the lines of a synthetic, densely packed PDB file with
+    roughly protein-like atom density.
+
+    Parameters
+    ----------
+    n_atoms : *int*
+        Number of ATOM records to create.
+    seed : *int*
+        Seed for the random atom placement.
+
+    Returns
+    -------
+    lines : *list, str*
+        Lines of the PDB file.
+
+    '''
+    rng = random.Random(seed)
+    residues = {"GLY": [" N  ", " CA ", " C  ", " O  "],
+                "SER": [" N  ", " CA ", " C  ", " O  ", " CB ", " OG "],
+                "LYS": [" N  ", " CA ", " C  ", " O  ", " CB ", " CG ", " NZ "],
+                "CYS": [" N  ", " CA ", " C  ", " O  ", " CB ", " SG "]}
+    names = sorted(residues)
+
+    # residues are placed on a cubic lattice with 3.8 angstrom spacing, shifted
+    # so that x needs all eight characters of its column, e.g. -150.123
+    side = max(2, round((n_atoms / 5.5) ** (1 / 3)))
+    lines = ["HEADER    SYNTHETIC STRUCTURE                     01-JAN-00   0SYN"]
+    serial = 0
+    residue = 0
+    while serial < n_atoms:
+        x, y, z = residue % side, residue // side % side, residue // side**2
+        residue += 1
+        res_name = rng.choice(names)
+        chain = chr(ord("A") + residue // 1000 % 26)
+        for atom in residues[res_name]:
+            if serial == n_atoms:
+                break
+            serial += 1
+            xyz = [3.8 * c + rng.uniform(-1.6, 1.6) + shift
+                   for c, shift in zip((x, y, z), (-150, -60, 10))]
+            lines.append("ATOM  %5d %4s %3s %1s%4d    %8.3f%8.3f%8.3f  1.00 20.00           %s"
+                         % (serial % 100000, atom, res_name, chain, residue % 10000,
+                            xyz[0], xyz[1], xyz[2], atom.strip()[0]))
+    lines.append("END")
+    return lines
+
+
+def brute_force_close(coordinates, keys, cutoff=2.7):
+    '''
+    Function with the original double loop of Application.close, used to check
+    the cell list results on small structures.
+    '''
+    pairs = []
+    for i in range(len(coordinates)):
+        for j in range(i + 1, len(coordinates)):
+            if keys[i] != keys[j]:
+                if np.sqrt(((coordinates[i] - coordinates[j])**2).sum()) <= cutoff:
+                    pairs.append((i, j))
+    return pairs
+
+
+def bench_decode(sizes=(1000, 20000, 200000)):
+    '''
+    Function to time the bulk coordinate decoder against per line float()
+    calls and check that both give the same coordinates, including the large
+    negative x coordinates that fill the whole column.
+    '''
+    print("coordinate decoding")
+    print("%10s %12s %12s" % ("atoms", "bulk s", "per line s"))
+    for n in sizes:
+        lines = synthetic_pdb(n)
+        buffer = "\n".join(lines).encode()
+
+        start = time.perf_counter()
+        xyz = main.decode_coordinates(buffer)
+        bulk = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reference = np.array([[float(line[30:38]), float(line[38:46]), float(line[46:54])]
+                              for line in lines if line[:4] == "ATOM"])
+        per_line = time.perf_counter() - start
+
+        assert np.array_equal(xyz, reference) and xyz[:, 0].min() < -100
+        print("%10d %12.3f %12.3f" % (n, bulk, per_line))
+
+
+def bench_close(sizes=(1000, 5000, 20000, 50000, 100000, 200000)):
+    '''
+    Function to time the close contact search from 1k to 200k atoms and print
+    the time per atom, which should stay roughly flat as the size grows.
+    '''
+    print("close contacts (2.7 A cell list)")
+    print("%10s %10s %10s %12s" % ("atoms", "pairs", "seconds", "us/atom"))
+    for n in sizes:
+        atoms = main.AtomTable("\n".join(synthetic_pdb(n)).encode())
+
+        start = time.perf_counter()
+        i, j = main.find_close_contacts(atoms.xyz, atoms.residue, 2.7)
+        seconds = time.perf_counter() - start
+
+        if n <= 1000:
+            assert list(zip(i, j)) == brute_force_close(atoms.xyz, atoms.residue, 2.7)
+        print("%10d %10d %10.3f %12.2f" % (n, len(i), seconds, 1e6 * seconds / n))
+
+
+def bench_disulfide(sizes=(1000, 20000, 200000)):
+    '''
+    Function to time the disulfide search and check its pairs against the
+    original double loop over the SG atoms, using a wide distance window so
+    the synthetic structures have pairs to compare.
+    '''
+    print("disulfide bonds (SG-SG 0-5 A)")
+    print("%10s %10s %10s" % ("atoms", "pairs", "ms"))
+    for n in sizes:
+        atoms = main.AtomTable("\n".join(synthetic_pdb(n)).encode())
+
+        start = time.perf_counter()
+        bonds = main.find_disulfides(atoms, 0, 5)
+        seconds = time.perf_counter() - start
+
+        if n <= 20000:
+            sulfur = atoms.select("ATOM", name="SG", res_name="CYS")
+            pairs = brute_force_close(atoms.xyz[sulfur], atoms.residue[sulfur], 5)
+            assert list(zip(bonds["i"], bonds["j"])) == [(sulfur[i], sulfur[j])
+                                                         for i, j in pairs]
+        print("%10d %10d %10.1f" % (n, len(bonds["i"]), 1000 * seconds))
+
+
+def reference_sliding_mean(values, window):
+    '''
+    Function with a plain loop over every full window of the values, used to
+    check the running sum version in main.sliding_mean.
+    '''
+    return [statistics.mean(values[i:i + window]) for i in range(len(values) - window + 1)]
+
+
+def bench_hydropathy(sizes=(100, 1000, 10000), windows=(1, 5, 19, 41)):
+    '''
+    Function to check the sliding window averages of the hydropathy graph
+    against the plain loop for several window lengths, and time both.
+    '''
+    rng = random.Random(0)
+    print("hydropathy sliding window")
+    print("%10s %8s %12s %12s" % ("residues", "window", "cumsum s", "loop s"))
+    for n in sizes:
+        values = [rng.choice((0.5, 1.81, -0.02, 3.64, -1.25, -2.09)) for i in range(n)]
+        for window in windows:
+            start = time.perf_counter()
+            averages = main.sliding_mean(values, window)
+            fast = time.perf_counter() - start
+
+            start = time.perf_counter()
+            reference = reference_sliding_mean(values, window)
+            slow = time.perf_counter() - start
+
+            assert len(averages) == len(reference) == n - window + 1
+            assert np.allclose(averages, reference, rtol=0, atol=1e-9)
+            print("%10d %8d %12.4f %12.4f" % (n, window, fast, slow))
+    assert len(main.sliding_mean(values[:10], 19)) == 0
+
+
+def bench_structure(sizes=(1000, 20000, 200000), n_records=300):
+    '''
+    Function to time filling in the secondary structure of every residue from
+    random HELIX and SHEET records, and check it against a loop over the
+    records for every residue on the smaller structures.
+    '''
+    rng = random.Random(0)
+    print("secondary structure (%d records)" % n_records)
+    print("%10s %10s %10s" % ("atoms", "residues", "ms"))
+    for n in sizes:
+        lines = synthetic_pdb(n)
+        records = []
+        for k in range(n_records):
+            chain = chr(ord("A") + rng.randrange(n // 5500 + 1))
+            first = rng.randrange(1, 9990)
+            last = first + rng.randrange(-2, 20)
+            if k % 2:
+                records.append("HELIX  %3d %3d ALA %s %4d  ALA %s %4d  1"
+                               % (k, k, chain, first, chain, last))
+            else:
+                records.append("SHEET  %3d %3s 2 ALA %s%4d  ALA %s%4d  0"
+                               % (k, "S%d" % (k % 9), chain, first, chain, last))
+        atoms = main.AtomTable("\n".join(lines[:1] + records + lines[1:]).encode())
+
+        start = time.perf_counter()
+        intervals = main.secondary_structure(atoms)
+        codes = main.structure_codes(atoms, intervals)
+        seconds = time.perf_counter() - start
+
+        if n <= 20000:
+            first = np.unique(atoms.residue, return_index=True)[1]
+            for key, atom in enumerate(first):
+                code = "-"
+                for kind, chain, low, high in zip(intervals["kind"], intervals["chain"],
+                                                  intervals["start"], intervals["end"]):
+                    if chain == atoms.chain[atom] and low <= atoms.res_seq[atom] <= high:
+                        if kind == "H" or code == "-":
+                            code = kind
+                assert codes[key] == code
+        print("%10d %10d %10.1f" % (n, len(codes), 1000 * seconds))
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    '''
+    Local stand-in for the PDB download server. It serves the gzipped files in
+    its files dictionary after a fixed delay that mimics network latency, and
+    answers 404 for any other ID.
+    '''
+
+    protocol_version = "HTTP/1.1"
+    files = {}
+    delay = 0.05
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        body = self.files.get(self.path.split("/")[-1])
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def bench_fetch(n_ids=40, n_atoms=5000, workers=8):
+    '''
+    Function to time fetching many IDs one after the other against fetching
+    them with fetch_many, using a local stand-in server so no internet
+    connection is needed.
+    '''
+    pdb_ids = ["%04d" % i for i in range(n_ids)]
+    text = "\n".join(synthetic_pdb(n_atoms)).encode()
+    StandInHandler.files = {pdb_id + ".pdb.gz": gzip.compress(text) for pdb_id in pdb_ids}
+
+    # a file with letters in its coordinate columns cannot be parsed
+    lines = synthetic_pdb(10)
+    lines[1] = lines[1][:30] + "   x.yyy" + lines[1][38:]
+    StandInHandler.files["BAD.pdb.gz"] = gzip.compress("\n".join(lines).encode())
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = "http://127.0.0.1:%d/download/" % server.server_port
+
+    print("fetching %d IDs with %.0f ms latency" % (n_ids, 1000 * StandInHandler.delay))
+    directory = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        cache = main.PDBCache(directory + "/sequential")
+        for pdb_id in pdb_ids + ["MISSING", "BAD"]:
+            try:
+                main.fetch_pdb(pdb_id, cache, base_url=base_url)
+            except (main.FetchError, ValueError):
+                pass
+        print("%20s %8.3f s" % ("one at a time", time.perf_counter() - start))
+
+        start = time.perf_counter()
+        cache = main.PDBCache(directory + "/batch")
+        atoms, errors = main.fetch_many(pdb_ids + ["MISSING", "BAD"], cache, workers,
+                                        base_url=base_url)
+        print("%20s %8.3f s" % ("fetch_many", time.perf_counter() - start))
+        assert len(atoms) == n_ids and sorted(errors) == ["BAD", "MISSING"]
+
+        start = time.perf_counter()
+        atoms, errors = main.fetch_many(pdb_ids, cache, workers, base_url=base_url)
+        print("%20s %8.3f s" % ("fetch_many, cached", time.perf_counter() - start))
+
+        start = time.perf_counter()
+        atoms, errors = main.fetch_many(pdb_ids, cache, workers, base_url=base_url, load=False)
+        print("%20s %8.3f s" % ("prefetch, cached", time.perf_counter() - start))
+        assert not atoms and not errors
+    finally:
+        server.shutdown()
+        shutil.rmtree(directory)
+
+
+def import_seconds(code):
+    '''
+    Function to run python code in a fresh interpreter with -X importtime and
+    return the total import time it reports in seconds.
+    '''
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    total = 0
+    for line in result.stderr.splitlines():
+        # top level imports are the only ones without indented names
+        if line.startswith("import time:") and "|" in line:
+            cumulative, name = line.split("|")[1:]
+            if cumulative.strip().isdigit() and not name.startswith("  "):
+                total += int(cumulative)
+    return total / 1e6
+
+
+def bench_startup(repeat=5):
+    '''
+    Function to compare the time to import main.py, which is all that happens
+    before the welcome screen is drawn, against importing it after the heavy
+    modules it used to import up front.
+    '''
+    eager = "import numpy, matplotlib.pyplot, requests, PIL.ImageTk, bcrypt; import main"
+    print("startup imports (best of %d)" % repeat)
+    lazy_time = min(import_seconds("import main") for i in range(repeat))
+    eager_time = min(import_seconds(eager) for i in range(repeat))
+    print("%20s %8.3f s" % ("lazy", lazy_time))
+    print("%20s %8.3f s" % ("eager", eager_time))
+
+
+if __name__ == "__main__":
+    bench_startup()
+    bench_decode()
+    bench_close()
+    bench_disulfide()
+    bench_hydropathy()
+    bench_structure()
+    bench_fetch()
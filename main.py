@@ -17,148 +17,2629 @@ try:
     from Tkinter import *
     import Tkinter.font as font
     from tkFileDialog import *
+    import ttk
 except ImportError:
-    # if user has python3
-    from tkinter import *
-    import tkinter.font as font
-    import tkinter.messagebox as mb
-    from tkinter import filedialog
-
-from PIL import *
-from PIL import ImageTk
+    try:
+        # if user has python3
+        from tkinter import *
+        import tkinter.font as font
+        import tkinter.messagebox as mb
+        from tkinter import filedialog
+        from tkinter import ttk
+    except ImportError:
+        # the command line tasks run without the Tk bindings, for example on
+        # a compute node without python3-tk, only the GUI classes need them
+        class Widget:
+            '''
+            Stand in base class of the GUI classes when Tk is not installed.
+            '''
+        Tk = None
+        Frame = Label = Widget
+
+import base64
 import hashlib
-from bcrypt import *
+import importlib.util
+import io
 import pickle
+import re
+import sys
+import argparse
 import os.path
 import os
-import requests
-from itertools import count, cycle
+import mmap
+import glob
+import gzip
+import zlib
+import json
+import shutil
+import tempfile
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import math
 import time
-from statistics import mean
-import numpy as np
-import matplotlib.pyplot as plt
 
 
-root = Tk()
+def lazy_import(name):
+    '''
+    Function to import a module only when one of its attributes is first
+    used, so heavy modules do not slow down the start of the program.
+
+    Parameters
+    ----------
+    name : *str*
+        Full name of the module.
+
+    Returns
+    -------
+    module : *module*
+        Module that finishes importing itself on first use.
+
+    '''
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# heavy modules that are only needed once a structure is loaded or a user
+# logs in; matplotlib and PIL are imported in the functions that use them
+np = lazy_import("numpy")
+requests = lazy_import("requests")
+bcrypt = lazy_import("bcrypt")
+
+# address PDB files are downloaded from
+PDB_URL = "https://files.rcsb.org/download/"
+# directory and size limit of the local cache of downloaded PDB files
+CACHE_DIR = "pdb_cache"
+CACHE_SIZE = 500 * 1024**2
+# format version of the binary sidecar of parsed atom arrays
+SIDECAR_VERSION = 3
+# sidecar arrays are opened by one thread at a time, see load_array
+SIDECAR_LOCK = threading.Lock()
+# database of hashed usernames and passwords
+ACCOUNTS_DB = "accounts.db"
+# standard atomic masses of the elements found in PDB files
+ELEMENT_MASSES = {"H": 1.008, "D": 2.014, "C": 12.011, "N": 14.007, "O": 15.999,
+                  "F": 18.998, "NA": 22.990, "MG": 24.305, "P": 30.974, "S": 32.06,
+                  "CL": 35.45, "K": 39.098, "CA": 40.078, "MN": 54.938, "FE": 55.845,
+                  "CO": 58.933, "NI": 58.693, "CU": 63.546, "ZN": 65.38,
+                  "SE": 78.971, "BR": 79.904, "I": 126.904}
+
+
+class ImageLabel(Label):
+    """
+    a label that displays images, and plays them if they are gifs.
+    Function was taken from https://stackoverflow.com/a/43770948
+    """
+
+    # frames of every image that was shown, shared by all labels so a frame
+    # is only decoded the first time it is shown
+    cache = {}
+
+    def load(self, im, size=None):
+        '''
+        Will load image for gif. Frames are decoded when they are first shown
+        and kept in the shared cache, so showing the same gif again does not
+        decode it again.
+        
+        Parameters
+        ----------
+        
+        im: *file*
+            Image to animate
+        size: *tuple, int*
+            Largest width and height to shrink the frames to, or None to show
+            them at their full size.
+        
+        Returns
+        ------
+        
+        None
+        '''
+        from PIL import Image
+
+        key = (im, size)
+        if key not in self.cache:
+            image = Image.open(im) if isinstance(im, str) else im
+            self.cache[key] = {"image": image,
+                               "frames": [None] * getattr(image, "n_frames", 1),
+                               "delay": image.info.get("duration", 100)}
+        self.cached = self.cache[key]
+        self.size = size
+        self.loc = 0
+        self.frames = self.cached["frames"]
+        self.delay = self.cached["delay"]
+        self.job = None
+
+        self.config(image=self.frame(0))
+        if len(self.frames) > 1:
+            self.job = self.after(self.delay, self.next_frame)
+
+    def frame(self, i):
+        '''
+        Function to return a frame of the image, decoding it the first time.
+
+        Parameters
+        ----------
+        i : *int*
+            Number of the frame.
+
+        Returns
+        -------
+        frame : *PhotoImage*
+            The frame ready to show on the label.
+
+        '''
+        if self.frames[i] is None:
+            from PIL import ImageTk
+
+            image = self.cached["image"]
+            image.seek(i)
+            frame = image.convert("RGBA")
+            if self.size is not None:
+                frame.thumbnail(self.size)
+            self.frames[i] = ImageTk.PhotoImage(frame)
+        return self.frames[i]
+
+    def unload(self):
+        '''
+        Function to stop the animation and clear the image. The decoded
+        frames stay in the cache for the next label that shows them.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if self.job is not None:
+            self.after_cancel(self.job)
+            self.job = None
+        self.config(image="")
+        self.frames = None
+
+    def next_frame(self):
+        '''
+        Function to loop through different frames in the image.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if self.frames:
+            self.loc += 1
+            self.loc %= len(self.frames)
+            self.config(image=self.frame(self.loc))
+            self.job = self.after(self.delay, self.next_frame)
+
+
+def loaddict(path="admin.txt"):
+    '''
+    Function to load the saved login database from the saved pickle 
+    format. Only used to copy the old login database into the AccountStore.
+
+    **Parameters**
+
+    path: *str*
+        Path of the pickled login database.
+
+    **Returns**
+
+    dictAdmin: *dict*
+        Dictionary containing encrypted login info
+
+    '''
+    with open(path, "rb") as dictAdmin:
+        return pickle.load(dictAdmin)
+
+
+class AccountStore:
+    '''
+    Login database kept in SQLite, with the hashed username as the primary
+    key. A login looks up a single account through the index instead of
+    loading every account, and a new account is one insert. Every call uses
+    its own connection, so users sharing the install, and threads, can use the
+    database at the same time; SQLite locks the file while an account is
+    written.
+    '''
+
+    def __init__(self, path=ACCOUNTS_DB, legacy="admin.txt"):
+        '''
+        Function to open the database, creating it if needed. A new database
+        starts with the accounts of the old pickled login database.
+
+        Parameters
+        ----------
+        path : *str*
+            Path of the SQLite database.
+        legacy : *str*
+            Path of the old pickled login database, or None.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.path = path
+        new = not os.path.isfile(path)
+        self.execute("CREATE TABLE IF NOT EXISTS accounts "
+                     "(user TEXT PRIMARY KEY, password BLOB NOT NULL) WITHOUT ROWID")
+        if new and legacy is not None and os.path.isfile(legacy):
+            self.execute_many("INSERT OR IGNORE INTO accounts VALUES (?, ?)",
+                              loaddict(legacy).items())
+
+    def execute(self, sql, parameters=()):
+        '''
+        Function to run one statement in its own transaction.
+
+        Parameters
+        ----------
+        sql : *str*
+            The SQL statement.
+        parameters : *tuple*
+            Values for the placeholders of the statement.
+
+        Returns
+        -------
+        rows : *list, tuple*
+            Rows returned by the statement.
+
+        '''
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                return db.execute(sql, parameters).fetchall()
+        finally:
+            db.close()
+
+    def execute_many(self, sql, rows):
+        '''
+        Function to run one statement for every row in a single transaction.
+        '''
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                db.executemany(sql, rows)
+        finally:
+            db.close()
+
+    def get(self, user):
+        '''
+        Function to look up the password of an account.
+
+        Parameters
+        ----------
+        user : *str*
+            The hashed username.
+
+        Returns
+        -------
+        password : *bytes*
+            The salted password hash, or None if there is no such account.
+
+        '''
+        rows = self.execute("SELECT password FROM accounts WHERE user = ?", (user,))
+        return rows[0][0] if rows else None
+
+    def add(self, user, password):
+        '''
+        Function to save a new account.
+
+        Parameters
+        ----------
+        user : *str*
+            The hashed username.
+        password : *bytes*
+            The salted password hash.
+
+        Returns
+        -------
+        added : *bool*
+            False if an account with this username already exists.
+
+        '''
+        try:
+            self.execute("INSERT INTO accounts VALUES (?, ?)", (user, password))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def __len__(self):
+        return self.execute("SELECT COUNT(*) FROM accounts")[0][0]
+
+
+class CellList:
+    '''
+    Uniform grid spatial index over a set of xyz coordinates. Every point is
+    binned into a cubic cell with an edge of at least the search cutoff, so a
+    neighbor search only has to look at the 27 cells surrounding a point
+    instead of every other point in the structure. Points can be split into
+    groups, like the models of an NMR ensemble, that are searched together but
+    only pair up within their own group.
+    '''
+
+    # offsets of a cell and its 26 neighbors
+    neighbors = [(i, j, k) for i in (-1, 0, 1)
+                 for j in (-1, 0, 1)
+                 for k in (-1, 0, 1)]
+
+    def __init__(self, coordinates, cell_size, groups=None):
+        '''
+        Function to bin the coordinates into cells and sort them by cell so
+        every cell can be looked up with a binary search.
+
+        Parameters
+        ----------
+        coordinates : *array, float*
+            An (N, 3) array of xyz coordinates.
+        cell_size : *float*
+            Edge length of a cell in angstroms, usually the search cutoff.
+        groups : *array, int*
+            Group number of every point, all points are in group 0 by default.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 3)
+        self.cell_size = float(cell_size)
+
+        if len(self.coordinates):
+            self.origin = self.coordinates.min(axis=0)
+            cells = self.cells(self.coordinates)
+            self.shape = cells.max(axis=0) + 1
+        else:
+            self.origin = np.zeros(3)
+            cells = np.zeros((0, 3), dtype=np.int64)
+            self.shape = np.ones(3, dtype=np.int64)
+
+        if groups is None:
+            self.groups = np.zeros(len(self.coordinates), dtype=np.int64)
+        else:
+            self.groups = np.asarray(groups, dtype=np.int64)
+
+        # points sorted by the flat index of their group and cell
+        keys = self.keys(cells, self.groups)
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.order]
+
+    def cells(self, points):
+        '''
+        Function to return the integer cell of every point.
+        '''
+        return np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+
+    def keys(self, cells, groups):
+        '''
+        Function to flatten (N, 3) integer cells and their groups into a single
+        cell index.
+        '''
+        return (((groups * self.shape[0] + cells[:, 0]) * self.shape[1] + cells[:, 1])
+                * self.shape[2] + cells[:, 2])
+
+    def candidates(self, points, groups):
+        '''
+        Function to find every indexed point lying in one of the 27 cells
+        around each query point, in the same group as the query point.
+
+        Parameters
+        ----------
+        points : *array, float*
+            An (M, 3) array of query coordinates.
+        groups : *array, int*
+            Group number of every query point.
+
+        Returns
+        -------
+        query, match: *array, int*
+            Parallel arrays with the index of the query point and the index of
+            the candidate point in the indexed coordinates.
+
+        '''
+        cells = self.cells(points)[:, None, :] + np.array(self.neighbors)[None, :, :]
+        query = np.repeat(np.arange(len(points)), len(self.neighbors))
+        cells = cells.reshape(-1, 3)
+
+        # neighboring cells that fall outside the grid hold no points
+        inside = np.all((cells >= 0) & (cells < self.shape), axis=1)
+        query = query[inside]
+        keys = self.keys(cells[inside], groups[query])
+
+        start = np.searchsorted(self.sorted_keys, keys, side="left")
+        stop = np.searchsorted(self.sorted_keys, keys, side="right")
+        count = stop - start
+
+        # expand every [start, stop) range into the positions it covers
+        query = np.repeat(query, count)
+        position = np.repeat(start - np.cumsum(count) + count, count) + \
+            np.arange(count.sum())
+        return query, self.order[position]
+
+    def query(self, points, cutoff, chunk_size=50000, upper=False, progress=None,
+              groups=None):
+        '''
+        Function to find every pair of a query point and an indexed point that
+        are within the cutoff distance of each other.
+
+        Parameters
+        ----------
+        points : *array, float*
+            An (M, 3) array of query coordinates.
+        cutoff : *float*
+            Largest distance in angstroms for a pair to be reported. Must not
+            be larger than the cell size.
+        chunk_size : *int*
+            Number of query points handled at once, which bounds memory use.
+        upper : *bool*
+            If the query points are the indexed coordinates themselves, only
+            keep the pairs where the indexed point comes after the query point.
+        progress : *function*
+            Called with the fraction of query points done after every chunk.
+        groups : *array, int*
+            Group number of every query point, all are in group 0 by default.
+
+        Returns
+        -------
+        query, match: *array, int*
+            Parallel arrays of pair indices ordered by query index and then by
+            indexed point.
+
+        '''
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if groups is None:
+            groups = np.zeros(len(points), dtype=np.int64)
+        groups = np.asarray(groups, dtype=np.int64)
+        query = []
+        match = []
+
+        for first in range(0, len(points), chunk_size):
+            q, m = self.candidates(points[first:first + chunk_size],
+                                   groups[first:first + chunk_size])
+            q += first
+            if upper:
+                q, m = q[m > q], m[m > q]
+
+            # same arithmetic as calc_atom_dist so boundary pairs agree
+            diff = points[q] - self.coordinates[m]
+            dist = np.sqrt(diff[:, 0]**2 + diff[:, 1]**2 + diff[:, 2]**2)
+            keep = dist <= cutoff
+            query.append(q[keep])
+            match.append(m[keep])
+            if progress is not None:
+                progress(min(first + chunk_size, len(points)) / len(points))
+
+        if not query:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        query = np.concatenate(query)
+        match = np.concatenate(match)
+        order = np.lexsort((match, query))
+        return query[order], match[order]
+
+    def pairs(self, cutoff, chunk_size=50000, progress=None):
+        '''
+        Function to find every pair of indexed points within the cutoff
+        distance of each other and in the same group, with each pair (i, j)
+        reported once as i < j.
+        '''
+        return self.query(self.coordinates, cutoff, chunk_size, True, progress, self.groups)
+
+
+def residue_keys(residues):
+    '''
+    Function to give every atom an integer key for the residue it belongs to,
+    so that atoms can be compared by residue without comparing strings.
+
+    Parameters
+    ----------
+    residues : *array, str*
+        Residue name, chain and residue number columns (18-26) of every atom.
+
+    Returns
+    -------
+    keys : *array, int*
+        Residue key of every atom.
+
+    '''
+    if not len(residues):
+        return np.zeros(0, dtype=np.int64)
+    return np.unique(residues, return_inverse=True)[1].reshape(-1)
+
+
+def find_close_contacts(coordinates, keys, cutoff=2.7, progress=None, groups=None):
+    '''
+    Function to find every pair of atoms closer than the cutoff distance that
+    are not on the same residue, and in the same group, such as a model.
+
+    Parameters
+    ----------
+    coordinates : *array, float*
+        An (N, 3) array of xyz coordinates.
+    keys : *array, int*
+        Residue key of every atom, see residue_keys.
+    cutoff : *float*
+        Largest distance in angstroms for two atoms to be in contact.
+    progress : *function*
+        Called with the fraction of the search done, see CellList.query.
+    groups : *array, int*
+        Group number of every atom, all are in group 0 by default.
+
+    Returns
+    -------
+    i, j: *array, int*
+        Parallel arrays of atom indices with i < j, ordered by i and then j.
+
+    '''
+    i, j = CellList(coordinates, cutoff, groups).pairs(cutoff, 10000, progress)
+    keep = keys[i] != keys[j]
+    return i[keep], j[keep]
+
+
+def secondary_structure(atoms):
+    '''
+    Function to read the HELIX and SHEET records of a PDB file into arrays
+    of residue ranges.
+
+    Parameters
+    ----------
+    atoms : *AtomTable*
+        Atom table of the PDB file.
+
+    Returns
+    -------
+    intervals : *dict*
+        Parallel arrays with one entry per record: "kind", H for a helix and
+        E for a sheet strand, "chain", "start" and "end" residue number, and
+        "sheet", the sheet ID of strands.
+
+    '''
+    rows = atoms.record_lines("HELIX", "SHEET")
+    columns = fixed_columns(atoms.data, atoms.line_starts[rows], atoms.line_ends[rows], 0, 40)
+    helix = np.char.strip(column_text(columns, 0, 6)) == b"HELIX"
+    intervals = {"kind": np.where(helix, "H", "E"),
+                 "chain": np.empty(len(rows), dtype="S1"),
+                 "start": np.zeros(len(rows), dtype=np.int64),
+                 "end": np.zeros(len(rows), dtype=np.int64),
+                 "sheet": np.full(len(rows), b"", dtype="S3")}
+
+    # the residue ranges are in different columns of HELIX and SHEET records
+    for rows, chain, start in ((helix, 19, 21), (~helix, 21, 22)):
+        intervals["chain"][rows] = column_text(columns[rows], chain, chain + 1)
+        intervals["start"][rows] = column_floats(columns[rows], start, start + 4)
+        intervals["end"][rows] = column_floats(columns[rows], 33, 37)
+    intervals["sheet"][~helix] = np.char.strip(column_text(columns[~helix], 11, 14))
+    return intervals
+
+
+def structure_codes(atoms, intervals):
+    '''
+    Function to expand residue ranges into the secondary structure of every
+    residue. The residues are sorted by chain and number once, every range
+    is turned into a +1 at its first residue and a -1 after its last one, and
+    a running sum marks every residue inside a range, so there is no loop
+    over the ranges. Helices win where a helix and a strand overlap.
+
+    Parameters
+    ----------
+    atoms : *AtomTable*
+        Atom table of the PDB file.
+    intervals : *dict*
+        Residue ranges, see secondary_structure.
+
+    Returns
+    -------
+    codes : *array, str*
+        H, E or - for every residue key, see AtomTable.residue, so the code
+        of atom i is codes[atoms.residue[i]].
+
+    '''
+    # chain and number of every residue from its first atom
+    first = np.unique(atoms.residue, return_index=True)[1]
+    codes = np.full(len(first), "-", dtype="U1")
+    if not len(first) or not len(intervals["kind"]):
+        return codes
+
+    # residues sorted by one integer made of the chain and number
+    chains = np.unique(np.concatenate((atoms.chain[first], intervals["chain"])))
+    offset = 1 << 31
+    key = np.searchsorted(chains, atoms.chain[first]) * (2 * offset) + atoms.res_seq[first] + offset
+    order = np.argsort(key, kind="stable")
+    key = key[order]
+    chain = np.searchsorted(chains, intervals["chain"]) * (2 * offset)
+    low = np.searchsorted(key, chain + intervals["start"] + offset, side="left")
+    high = np.searchsorted(key, chain + intervals["end"] + offset, side="right")
+
+    for code in ("E", "H"):
+        keep = (intervals["kind"] == code) & (high > low)
+        cover = np.zeros(len(first) + 1, dtype=np.int64)
+        np.add.at(cover, low[keep], 1)
+        np.add.at(cover, high[keep], -1)
+        codes[order[np.cumsum(cover[:-1]) > 0]] = code
+    return codes
+
+
+def dihedral_angles(p0, p1, p2, p3):
+    '''
+    Function to calculate the dihedral angle of every set of four points,
+    the angle between the p0-p1-p2 and p1-p2-p3 planes.
+
+    Parameters
+    ----------
+    p0, p1, p2, p3 : *array, float*
+        (N, 3) arrays of xyz coordinates.
+
+    Returns
+    -------
+    angles : *array, float*
+        Dihedral angles in degrees, from -180 to 180.
+
+    '''
+    b0 = p0 - p1
+    b1 = p2 - p1
+    b2 = p3 - p2
+    b1 = b1 / np.linalg.norm(b1, axis=1)[:, None]
+
+    # parts of b0 and b2 at right angles to the middle bond
+    v = b0 - (b0 * b1).sum(axis=1)[:, None] * b1
+    w = b2 - (b2 * b1).sum(axis=1)[:, None] * b1
+    x = (v * w).sum(axis=1)
+    y = (np.cross(b1, v) * w).sum(axis=1)
+    return np.degrees(np.arctan2(y, x))
+
+
+def find_disulfides(atoms, low=2.0, high=2.1):
+    '''
+    Function to find the disulfide bonds of a structure, the pairs of
+    cysteine SG atoms on different residues with a bond length between low
+    and high in the same model, and score the CB-SG-SG-CB dihedral angle of
+    every bond.
+    Disulfide bonds have this angle close to +90 or -90 degrees, so the score
+    sin(angle)**2 is near 1 for likely bonds and near 0 for strained ones.
+
+    Parameters
+    ----------
+    atoms : *AtomTable*
+        Atom table of the PDB file.
+    low : *float*
+        Shortest SG-SG distance in angstroms of a bond.
+    high : *float*
+        Longest SG-SG distance in angstroms of a bond.
+
+    Returns
+    -------
+    bonds : *dict*
+        Parallel arrays "i" and "j" of SG atom rows, "distance", "dihedral"
+        in degrees and "score", ordered by i and then j. The dihedral and
+        score are NaN if a cysteine has no CB atom.
+
+    '''
+    sulfur = atoms.select("ATOM", name="SG", res_name="CYS")
+    i, j = CellList(atoms.xyz[sulfur], high, atoms.model[sulfur]).pairs(high)
+    i, j = sulfur[i], sulfur[j]
+    distance = np.sqrt(((atoms.xyz[i] - atoms.xyz[j])**2).sum(axis=1))
+    keep = (atoms.residue[i] != atoms.residue[j]) & (distance >= low)
+    i, j, distance = i[keep], j[keep], distance[keep]
+
+    # CB atom of the residue of every SG atom, -1 if it has none
+    beta = atoms.select("ATOM", name="CB", res_name="CYS")
+    beta_of = np.full(int(atoms.residue.max(initial=0)) + 1, -1)
+    beta_of[atoms.residue[beta]] = beta
+    beta_i, beta_j = beta_of[atoms.residue[i]], beta_of[atoms.residue[j]]
+
+    dihedral = np.full(len(i), np.nan)
+    found = (beta_i >= 0) & (beta_j >= 0)
+    dihedral[found] = dihedral_angles(atoms.xyz[beta_i[found]], atoms.xyz[i[found]],
+                                      atoms.xyz[j[found]], atoms.xyz[beta_j[found]])
+    score = np.sin(np.radians(dihedral))**2
+    return {"i": i, "j": j, "distance": distance, "dihedral": dihedral, "score": score}
+
+
+def atom_masses(atoms, rows):
+    '''
+    Function to look up the mass of atoms from their element column. If the
+    element column is blank, as in some older files, the element is taken
+    from the atom name, which starts with the element right justified in its
+    first two characters. Unknown elements count as carbon.
+
+    Parameters
+    ----------
+    atoms : *AtomTable*
+        Atom table of the PDB file.
+    rows : *array, int*
+        Atom rows to look up.
+
+    Returns
+    -------
+    masses : *array, float*
+        Mass of every atom in daltons.
+
+    '''
+    # the element is only worked out once for every distinct pair of atom
+    # name and element column
+    keys, codes = np.unique(np.char.add(atoms.name[rows], atoms.element[rows]),
+                            return_inverse=True)
+
+    table = []
+    for key in keys:
+        text = key.decode(errors="replace")
+        name, element = text[:4].upper(), text[4:].strip().upper()
+        if not element:
+            # names starting with a space or digit have a one letter element,
+            # others a two letter one unless it is not an element, like HG11
+            # for hydrogens
+            if name[:1] in " 0123456789" or name[:2] not in ELEMENT_MASSES:
+                element = name.lstrip(" 0123456789")[:1]
+            else:
+                element = name[:2]
+        table.append(ELEMENT_MASSES.get(element, ELEMENT_MASSES["C"]))
+    return np.array(table)[codes.reshape(-1)]
+
+
+def radius_of_gyration(xyz, masses, groups, count):
+    '''
+    Function to calculate the mass weighted center of mass and radius of
+    gyration, the root mean square distance of the mass from its center, of
+    several groups of atoms at once. The sums over every group are taken
+    with np.bincount, so there is no loop over the groups.
+
+    Parameters
+    ----------
+    xyz : *array, float*
+        An (N, 3) array of xyz coordinates.
+    masses : *array, float*
+        Mass of every atom.
+    groups : *array, int*
+        Group number of every atom, from 0 to count - 1.
+    count : *int*
+        Number of groups.
+
+    Returns
+    -------
+    centers : *array, float*
+        A (count, 3) array with the xyz coordinates of the center of mass of
+        every group, NaN for empty groups.
+    radii : *array, float*
+        Radius of gyration of every group in angstroms.
+
+    '''
+    xyz = np.asarray(xyz, dtype=float)
+    total = np.bincount(groups, masses, count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        centers = np.stack([np.bincount(groups, masses * xyz[:, k], count)
+                            for k in range(3)], axis=1) / total[:, None]
+        # second pass around the centers, more accurate than subtracting the
+        # squared center from the mean squared coordinate
+        squares = masses * ((xyz - centers[groups])**2).sum(axis=1)
+        radii = np.sqrt(np.bincount(groups, squares, count) / total)
+    return centers, radii
+
+
+def parse_domain(text):
+    '''
+    Function to read a domain given as a chain and a range of residue
+    numbers, for example A:1-120.
+
+    Parameters
+    ----------
+    text : *str*
+        The domain.
+
+    Returns
+    -------
+    domain : *tuple*
+        The text as label, the chain, first and last residue number.
+
+    '''
+    match = re.fullmatch(r"(\w?):(-?\d+)-(-?\d+)", text.strip())
+    if match is None:
+        raise ValueError("A domain is written as chain:first-last, like A:1-120")
+    return text.strip(), match.group(1) or " ", int(match.group(2)), int(match.group(3))
+
+
+def parse_range(text):
+    '''
+    Function to read a range of distances given as two numbers separated by
+    a comma, for example 2.0,2.1.
+
+    Parameters
+    ----------
+    text : *str*
+        The range.
+
+    Returns
+    -------
+    distances : *tuple, float*
+        The shortest and longest distance.
+
+    '''
+    match = re.fullmatch(r"(\d*\.?\d+),(\d*\.?\d+)", text.replace(" ", ""))
+    # the longest distance is also the cell size of the neighbor search, so
+    # it has to be above zero
+    if match is None or float(match.group(1)) > float(match.group(2)) or \
+            float(match.group(2)) <= 0:
+        raise ValueError("A range is written as low,high with high above zero, like 2.0,2.1")
+    return float(match.group(1)), float(match.group(2))
+
+
+def index_lines(data, chunk_size=1 << 22):
+    '''
+    Function to find where every line of a PDB file starts and ends.
+
+    Parameters
+    ----------
+    data : *array, uint8*
+        Bytes of the whole PDB file.
+    chunk_size : *int*
+        Number of bytes searched at once, so a large memory mapped file is
+        never copied whole.
+
+    Returns
+    -------
+    starts, ends : *array, int*
+        Offset of the first character of every line and of the character
+        after its last one, not counting the line ending.
+
+    '''
+    if not len(data):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    newlines = np.concatenate([np.flatnonzero(data[i:i + chunk_size] == ord("\n")) + i
+                               for i in range(0, len(data), chunk_size)])
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(data)]))
+
+    # drops the empty piece after a final newline and carriage returns
+    if len(data) and data[-1] == ord("\n"):
+        starts, ends = starts[:-1], ends[:-1]
+    crlf = (ends > starts) & (data[np.maximum(ends - 1, 0)] == ord("\r"))
+    ends = ends - crlf
+    return starts, ends
+
+
+def fixed_columns(data, starts, ends, first, last, chunk_size=8192):
+    '''
+    Function to cut the same fixed columns out of many lines at once. Lines
+    that are too short are padded with spaces, as the PDB format allows the
+    trailing columns to be left off.
+
+    Parameters
+    ----------
+    data : *array, uint8*
+        Bytes of the whole PDB file.
+    starts, ends : *array, int*
+        Offsets of the lines, see index_lines.
+    first, last : *int*
+        Python style slice of the columns, so [30:38] is columns 31-38.
+    chunk_size : *int*
+        Number of lines handled at once, which bounds memory use.
+
+    Returns
+    -------
+    columns : *array, uint8*
+        An (N, last - first) array with the characters of every line.
+
+    '''
+    columns = np.full((len(starts), last - first), ord(" "), dtype=np.uint8)
+
+    for row in range(0, len(starts), chunk_size):
+        chunk_starts = starts[row:row + chunk_size]
+        chunk_ends = ends[row:row + chunk_size]
+
+        # offsets are counted from the first line of the chunk, so they fit
+        # in 32 bits unless the lines of one chunk span gigabytes
+        base = int(chunk_starts.min())
+        span = int(chunk_ends.max()) - base + last
+        dtype = np.int32 if span < 2**31 else np.int64
+        index = (chunk_starts - base).astype(dtype)[:, None] + np.arange(first, last, dtype=dtype)
+        inside = index < (chunk_ends - base).astype(dtype)[:, None]
+        columns[row:row + chunk_size][inside] = data[base:][index[inside]]
+    return columns
+
+
+def column_text(columns, first, last):
+    '''
+    Function to turn the fixed columns [first:last] of every line into an
+    array of byte strings, which take one byte per character.
+    '''
+    width = str(last - first)
+    return np.ascontiguousarray(columns[:, first:last]).view("S" + width).reshape(-1)
+
+
+def column_floats(columns, first, last):
+    '''
+    Function to convert the number in the fixed columns [first:last] of every
+    line to a float, treating a blank column as zero.
+    '''
+    field = np.array(columns[:, first:last])
+    field[np.all(field == ord(" "), axis=1), -1] = ord("0")
+    return field.view("S" + str(last - first)).reshape(-1).astype(float)
+
+
+def atom_rows(data, starts, ends):
+    '''
+    Function to find which lines are ATOM or HETATM records.
+    '''
+    record = fixed_columns(data, starts, ends, 0, 6)
+    return np.all(record == np.frombuffer(b"ATOM  ", np.uint8), axis=1) | \
+        np.all(record == np.frombuffer(b"HETATM", np.uint8), axis=1)
+
+
+def decode_coordinates(buffer):
+    '''
+    Function to decode the x, y and z columns (31-38, 39-46 and 47-54) of
+    every ATOM and HETATM record of a PDB file in one vectorized pass.
+
+    Parameters
+    ----------
+    buffer : *bytes*
+        Contents of the whole PDB file.
+
+    Returns
+    -------
+    xyz : *array, float*
+        An (N, 3) array of coordinates in file order.
+
+    '''
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    starts, ends = index_lines(data)
+    atoms = atom_rows(data, starts, ends)
+    columns = fixed_columns(data, starts[atoms], ends[atoms], 30, 54)
+    return coordinate_columns(columns)
+
+
+def atom_columns(data, starts, ends):
+    '''
+    Function to cut the columns that AtomTable decodes out of many atom
+    records at once: columns 1-66, from the record name to the B-factor,
+    followed by the element in columns 77-78, so the element is at [66:68].
+    The segment ID and charge are never read and are left out.
+    '''
+    return np.concatenate((fixed_columns(data, starts, ends, 0, 66),
+                           fixed_columns(data, starts, ends, 76, 78)), axis=1)
+
+
+def coordinate_columns(columns):
+    '''
+    Function to decode the 24 characters of the three 8 character coordinate
+    columns of every atom into an (N, 3) array.
+    '''
+    columns = np.ascontiguousarray(columns)
+    return columns.view("S8").reshape(-1, 3).astype(float)
+
+
+def map_file(path):
+    '''
+    Function to map a file into memory read only, so it can be parsed without
+    reading the whole file into Python strings first. Pages are only loaded
+    from disk when the parser touches them.
+
+    Parameters
+    ----------
+    path : *str*
+        Path of the file.
+
+    Returns
+    -------
+    buffer : *mmap*
+        The mapped file, or empty bytes for an empty file, which cannot be
+        mapped.
+
+    '''
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def load_array(path, mmap_mode=None):
+    '''
+    Function to open one array of a sidecar. numpy reads the header of a .npy
+    file with ast.literal_eval, which is not safe to call from several threads
+    at once on some Python versions, so threads take turns opening arrays.
+    Opening a memory mapped array only reads its header.
+    '''
+    with SIDECAR_LOCK:
+        return np.load(path, mmap_mode=mmap_mode)
+
+
+def file_checksum(path):
+    '''
+    Function to return the SHA-256 hex digest of a file, read in blocks.
+    '''
+    checksum = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+def open_pdb(path):
+    '''
+    Function to return the contents of a PDB file. A plain file is mapped into
+    memory, and a gzipped file, such as a .pdb.gz from the PDB, is
+    decompressed into memory.
+
+    Parameters
+    ----------
+    path : *str*
+        Path of the PDB file.
+
+    Returns
+    -------
+    buffer : *mmap or bytes*
+        Contents of the file.
+
+    '''
+    buffer = map_file(path)
+    if buffer[:2] == b"\x1f\x8b":
+        with gzip.open(path) as f:
+            return f.read()
+    return buffer
+
+
+def load_pdb(path, checksum=None, buffer=None):
+    '''
+    Function to load the atom table of a PDB file from its binary sidecar, or
+    parse the file and write the sidecar if there is none or it is stale.
+
+    Parameters
+    ----------
+    path : *str*
+        Path of the PDB file, which may be gzipped.
+    checksum : *str*
+        SHA-256 hex digest of the file, if it is already known.
+    buffer : *mmap or bytes*
+        Contents of the file, if it was already opened with open_pdb.
+
+    Returns
+    -------
+    atoms : *AtomTable*
+        Atom table of the file.
+
+    '''
+    if buffer is None:
+        buffer = open_pdb(path)
+    atoms = AtomTable.load(path, buffer)
+    if atoms is None:
+        atoms = AtomTable(buffer)
+        try:
+            atoms.save(path, checksum)
+        except OSError:
+            # a read only directory just means the file is parsed every time
+            pass
+    return atoms
+
+
+class AtomTable:
+    '''
+    Columnar table of the ATOM and HETATM records of a PDB file. The file is
+    parsed once when it is fetched or uploaded and every task selects atoms
+    from these arrays instead of rescanning and slicing the raw lines.
+    '''
+
+    def __init__(self, buffer, index=None, columns=None, chunk_size=65536):
+        '''
+        Function to cut the fixed columns of every ATOM and HETATM record out
+        of the file and decode them into parallel arrays. The records are cut
+        and decoded a chunk at a time, so only the finished arrays grow with
+        the size of the file. Text columns are kept as byte strings.
+
+        Parameters
+        ----------
+        buffer : *bytes or mmap*
+            Contents of the whole PDB file, for example from map_file.
+        index : *tuple, array*
+            Line starts, line ends and atom record mask of the file if they
+            were already found, for example by PDBStreamParser.
+        columns : *array, uint8*
+            The columns of every atom record if they were already cut out of
+            the file, see atom_columns.
+        chunk_size : *int*
+            Number of atom records decoded at once.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.data = np.frombuffer(buffer, dtype=np.uint8)
+        if index is None:
+            starts, ends = index_lines(self.data)
+            index = (starts, ends, atom_rows(self.data, starts, ends))
+        self.line_starts, self.line_ends, atoms = index
+
+        # offsets of the original lines so tasks can write them to their output files
+        self.starts = self.line_starts[atoms]
+        self.ends = self.line_ends[atoms]
+
+        # record name, either ATOM or HETATM
+        self.record = np.empty(len(self.starts), dtype="S6")
+        # full four character atom name field, so " CA " and "CA  " differ
+        self.name = np.empty(len(self.starts), dtype="S4")
+        self.res_name = np.empty(len(self.starts), dtype="S3")
+        self.chain = np.empty(len(self.starts), dtype="S1")
+        self.res_seq = np.empty(len(self.starts), dtype=np.int32)
+        self.icode = np.empty(len(self.starts), dtype="S1")
+        self.xyz = np.empty((len(self.starts), 3))
+        self.occupancy = np.empty(len(self.starts))
+        self.b_factor = np.empty(len(self.starts))
+        self.element = np.empty(len(self.starts), dtype="S2")
+        # residue name, chain and number columns (18-26) of every atom
+        residues = np.empty(len(self.starts), dtype="S9")
+
+        for row in range(0, len(self.starts), chunk_size):
+            rows = slice(row, row + chunk_size)
+            if columns is None:
+                block = atom_columns(self.data, self.starts[rows], self.ends[rows])
+            else:
+                block = columns[rows]
+            self.record[rows] = np.char.strip(column_text(block, 0, 6))
+            self.name[rows] = column_text(block, 12, 16)
+            self.res_name[rows] = column_text(block, 17, 20)
+            self.chain[rows] = column_text(block, 21, 22)
+            self.res_seq[rows] = column_floats(block, 22, 26)
+            self.icode[rows] = column_text(block, 26, 27)
+            self.xyz[rows] = coordinate_columns(block[:, 30:54])
+            self.occupancy[rows] = column_floats(block, 54, 60)
+            self.b_factor[rows] = column_floats(block, 60, 66)
+            self.element[rows] = np.char.strip(column_text(block, 66, 68))
+            residues[rows] = column_text(block, 17, 26)
+
+        # number of the model of every atom, counted from 0 in the order of
+        # the MODEL records, all atoms are in model 0 if there are none
+        models = [match.start() for match in re.finditer(rb"^MODEL ", buffer, re.M)]
+        self.model = np.maximum(np.searchsorted(models, self.starts, side="right") - 1,
+                                0).astype(np.int32)
+
+        # integer key for the model, residue name, chain and number of every atom
+        keys = residue_keys(residues)
+        del residues
+        self.residue = residue_keys(self.model.astype(np.int64) * (int(keys.max(initial=0)) + 1) +
+                                    keys).astype(np.int32)
+
+    # columns saved as small integer codes into a table of their distinct values
+    text_fields = ("record", "name", "res_name", "chain", "icode", "element")
+    # remaining columns and the types they are saved as, the line ends and
+    # atom offsets are saved as line lengths and atom line numbers instead
+    number_fields = (("line_starts", "int64"),
+                     ("res_seq", "int32"), ("residue", "int32"), ("model", "int32"),
+                     ("xyz", "float32"), ("occupancy", "float32"),
+                     ("b_factor", "float32"))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def save(self, path, checksum=None):
+        '''
+        Function to save the parsed arrays into a binary sidecar directory next
+        to the PDB file, so the file does not have to be parsed again. The
+        sidecar records the size, modification time and SHA-256 checksum of
+        the PDB file so a changed file is noticed.
+
+        Parameters
+        ----------
+        path : *str*
+            Path of the PDB file the table was parsed from, which may be
+            gzipped.
+        checksum : *str*
+            SHA-256 hex digest of the file on disk, if it is already known.
+
+        Returns
+        -------
+        None.
+
+        '''
+        stat = os.stat(path)
+        meta = {"version": SIDECAR_VERSION, "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "sha256": checksum or file_checksum(path)}
+
+        # writes into a temporary directory first so a half written sidecar
+        # is never read
+        sidecar = path + ".atoms"
+        temporary = sidecar + ".tmp" + str(os.getpid())
+        os.makedirs(temporary, exist_ok=True)
+        for field in self.text_fields:
+            table, codes = np.unique(getattr(self, field), return_inverse=True)
+            np.save(os.path.join(temporary, field + "_table.npy"), table)
+            np.save(os.path.join(temporary, field + ".npy"),
+                    codes.reshape(-1).astype(np.min_scalar_type(len(table))))
+        for field, dtype in self.number_fields:
+            np.save(os.path.join(temporary, field + ".npy"),
+                    getattr(self, field).astype(dtype))
+        lengths = self.line_ends - self.line_starts
+        rows = np.searchsorted(self.line_starts, self.starts)
+        np.save(os.path.join(temporary, "line_lengths.npy"),
+                lengths.astype(np.min_scalar_type(lengths.max(initial=0))))
+        np.save(os.path.join(temporary, "atom_rows.npy"),
+                rows.astype(np.min_scalar_type(len(self.line_starts))))
+        with open(os.path.join(temporary, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+        shutil.rmtree(sidecar, ignore_errors=True)
+        try:
+            os.rename(temporary, sidecar)
+        except OSError:
+            # another process sharing the cache saved the sidecar first
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path, buffer):
+        '''
+        Function to rebuild an atom table from the sidecar of a PDB file. The
+        arrays are memory mapped, so only the parts a task touches are read.
+
+        Parameters
+        ----------
+        path : *str*
+            Path of the PDB file.
+        buffer : *bytes or mmap*
+            Contents of the PDB file.
+
+        Returns
+        -------
+        atoms : *AtomTable*
+            The atom table, or None if there is no sidecar or the PDB file
+            changed since it was saved.
+
+        '''
+        sidecar = path + ".atoms"
+        try:
+            with open(os.path.join(sidecar, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # a new modification time only invalidates the sidecar if the
+        # contents changed as well
+        stat = os.stat(path)
+        if meta.get("version") != SIDECAR_VERSION or meta["size"] != stat.st_size:
+            return None
+        if meta["mtime"] != stat.st_mtime_ns:
+            if meta["sha256"] != file_checksum(path):
+                return None
+            meta["mtime"] = stat.st_mtime_ns
+            with open(os.path.join(sidecar, "meta.json"), "w") as f:
+                json.dump(meta, f)
+
+        atoms = cls.__new__(cls)
+        atoms.data = np.frombuffer(buffer, dtype=np.uint8)
+        for field in cls.text_fields:
+            table = load_array(os.path.join(sidecar, field + "_table.npy"))
+            codes = load_array(os.path.join(sidecar, field + ".npy"), mmap_mode="r")
+            setattr(atoms, field, table[codes])
+        for field, dtype in cls.number_fields:
+            setattr(atoms, field, load_array(os.path.join(sidecar, field + ".npy"),
+                                             mmap_mode="r"))
+        atoms.line_ends = atoms.line_starts + load_array(os.path.join(sidecar,
+                                                                      "line_lengths.npy"))
+        rows = load_array(os.path.join(sidecar, "atom_rows.npy"))
+        atoms.starts = atoms.line_starts[rows]
+        atoms.ends = atoms.line_ends[rows]
+
+        # the file has three decimals for coordinates and two for occupancy
+        # and B-factor, so rounding gives back exactly the parsed values
+        atoms.xyz = np.round(atoms.xyz.astype(float), 3)
+        atoms.occupancy = np.round(atoms.occupancy.astype(float), 2)
+        atoms.b_factor = np.round(atoms.b_factor.astype(float), 2)
+        return atoms
+
+    def line(self, i):
+        '''
+        Function to return the original line of atom i from the file.
+        '''
+        return self.data[self.starts[i]:self.ends[i]].tobytes().decode()
+
+    def record_lines(self, *names):
+        '''
+        Function to return the line numbers of the given record types, for
+        example HELIX and SHEET, in file order.
+        '''
+        columns = fixed_columns(self.data, self.line_starts, self.line_ends, 0, 6)
+        record = np.char.strip(column_text(columns, 0, 6))
+        return np.flatnonzero(np.isin(record, [name.encode() for name in names]))
+
+    def records(self, *names):
+        '''
+        Function to return the lines of the given record types, for example
+        HELIX and SHEET, in file order.
+        '''
+        return [self.data[self.line_starts[i]:self.line_ends[i]].tobytes().decode()
+                for i in self.record_lines(*names)]
+
+    def models(self):
+        '''
+        Function to return the number of models in the file, 1 if it has no
+        MODEL records. The atoms are in file order, so the last atom is in the
+        last model.
+        '''
+        return int(self.model[-1]) + 1 if len(self.model) else 1
+
+    def select(self, record="ATOM", name=None, res_name=None, model=None):
+        '''
+        Function to return the indices of the atoms of one record type, with
+        an optional atom name, matched from the second column of the atom name
+        field as the PDB element convention puts it, and residue name.
+
+        Parameters
+        ----------
+        record : *str*
+            Record type, either ATOM or HETATM.
+        name : *str*
+            Start of the atom name, for example "CA" or "O".
+        res_name : *str*
+            Three letter residue name.
+        model : *int*
+            Number of the model, counted from 0, or None for every model.
+
+        Returns
+        -------
+        index : *array, int*
+            Indices of the selected atoms in file order.
+
+        '''
+        # the text columns are byte strings
+        mask = self.record == record.encode()
+        if name is not None:
+            mask &= np.char.startswith(self.name, name.encode(), 1)
+        if res_name is not None:
+            mask &= self.res_name == res_name.encode()
+        if model is not None:
+            mask &= self.model == model
+        return np.flatnonzero(mask)
+
+
+class PDBStreamParser:
+    '''
+    Incremental parser that is fed a PDB file in chunks while it downloads.
+    The complete lines of every chunk are indexed and the columns of their atom
+    records are cut out straight away, so when the last chunk arrives only the
+    decoding of the columns into an AtomTable is left.
+    '''
+
+    def __init__(self):
+        '''
+        Function to set up an empty buffer and empty lists for the index and
+        atom columns of the parsed lines.
+        '''
+        self.buffer = bytearray()
+        self.parsed = 0
+        self.line_starts = [np.zeros(0, dtype=np.int64)]
+        self.line_ends = [np.zeros(0, dtype=np.int64)]
+        self.atoms = [np.zeros(0, dtype=bool)]
+        self.columns = [np.zeros((0, 68), dtype=np.uint8)]
+
+    def feed(self, chunk):
+        '''
+        Function to add a downloaded chunk and parse every line it completes.
+
+        Parameters
+        ----------
+        chunk : *bytes*
+            Next piece of the file.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.buffer += chunk
+        last = self.buffer.rfind(b"\n", self.parsed) + 1
+        if last > self.parsed:
+            self.parse(last)
+
+    def parse(self, last):
+        '''
+        Function to index the lines between the end of the parsed part of the
+        buffer and the offset last, and cut out the columns of their atoms.
+        '''
+        first = self.parsed
+        data = np.frombuffer(self.buffer[first:last], dtype=np.uint8)
+        starts, ends = index_lines(data)
+        atoms = atom_rows(data, starts, ends)
+
+        self.line_starts.append(starts + first)
+        self.line_ends.append(ends + first)
+        self.atoms.append(atoms)
+        self.columns.append(atom_columns(data, starts[atoms], ends[atoms]))
+        self.parsed = last
+
+    def close(self):
+        '''
+        Function to parse a last line without a newline and build the atom
+        table of the whole file.
+
+        Returns
+        -------
+        atoms : *AtomTable*
+            Atom table of the downloaded file.
+
+        '''
+        if self.parsed < len(self.buffer):
+            self.parse(len(self.buffer))
+        index = (np.concatenate(self.line_starts), np.concatenate(self.line_ends),
+                 np.concatenate(self.atoms))
+        return AtomTable(self.buffer, index, np.concatenate(self.columns))
+
+
+class PDBCache:
+    '''
+    Local cache of downloaded PDB files, kept gzipped as they are served, and
+    the binary sidecars of their parsed atom tables. Every entry is named
+    after the PDB ID and a checksum of the file contents, and entries that
+    have not been used for the longest time are removed once the cache grows
+    past its size limit.
+    '''
+
+    # entries are saved as the gzipped file from the PDB
+    extension = ".pdb.gz"
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_SIZE):
+        '''
+        Function to set up the cache directory.
+
+        Parameters
+        ----------
+        directory : *str*
+            Directory the entries are saved in.
+        max_bytes : *int*
+            Largest total size of the entries in bytes.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+        # entries are looked up, added and evicted by one thread at a time
+        # when files are fetched in parallel
+        self.lock = threading.Lock()
+
+    def path(self, key, extension):
+        '''
+        Function to return the path of one file of an entry.
+        '''
+        return os.path.join(self.directory, key + extension)
+
+    def entries(self):
+        '''
+        Function to list the entries in the cache. This scans the whole
+        directory, so it is only used to evict entries.
+
+        Returns
+        -------
+        entries : *list, tuple*
+            Last use time, total size in bytes and key of every entry,
+            least recently used first.
+
+        '''
+        entries = []
+        for filename in os.listdir(self.directory):
+            if filename.endswith(self.extension):
+                key = filename[:-len(self.extension)]
+                sidecar = self.path(key, self.extension + ".atoms")
+                try:
+                    stat = os.stat(self.path(key, self.extension))
+                    size = stat.st_size
+                    if os.path.isdir(sidecar):
+                        size += sum(os.path.getsize(os.path.join(sidecar, name))
+                                    for name in os.listdir(sidecar))
+                except FileNotFoundError:
+                    # evicted by another process sharing the cache
+                    continue
+                entries.append((stat.st_atime_ns, size, key))
+        return sorted(entries)
+
+    def find(self, pdb_id):
+        '''
+        Function to return the key of the entry for a PDB ID, or None if the
+        ID is not in the cache.
+        '''
+        # only the files of this ID are looked at, not the whole cache
+        pattern = glob.escape(pdb_id.upper()) + "_*" + self.extension
+        entries = []
+        for path in glob.glob(os.path.join(glob.escape(self.directory), pattern)):
+            try:
+                entries.append((os.stat(path).st_atime_ns,
+                                os.path.basename(path)[:-len(self.extension)]))
+            except FileNotFoundError:
+                # evicted by another process sharing the cache
+                continue
+        return max(entries)[1] if entries else None
+
+    def touch(self, pdb_id):
+        '''
+        Function to mark the entry of a PDB ID as the most recently used one.
+
+        Parameters
+        ----------
+        pdb_id : *str*
+            Four character PDB ID.
+
+        Returns
+        -------
+        path : *str*
+            Path of the file in the cache, or None if the ID is not in the
+            cache.
+
+        '''
+        with self.lock:
+            key = self.find(pdb_id)
+            if key is None:
+                return None
+
+            # the last use is kept as the access time, leaving the modification
+            # time that the sidecar is checked against untouched
+            path = self.path(key, self.extension)
+            try:
+                os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+            except FileNotFoundError:
+                return None
+            return path
+
+    def get(self, pdb_id):
+        '''
+        Function to load a PDB file and its atom table from the cache, and mark
+        the entry as the most recently used one.
+
+        Parameters
+        ----------
+        pdb_id : *str*
+            Four character PDB ID.
+
+        Returns
+        -------
+        atoms : *AtomTable*
+            Atom table of the file, or None if the ID is not in the cache.
+
+        '''
+        path = self.touch(pdb_id)
+        if path is None:
+            return None
+
+        # the file is loaded outside of the lock so cache hits of different
+        # IDs are loaded at the same time
+        try:
+            return load_pdb(path)
+        except FileNotFoundError:
+            # evicted by another process sharing the cache in the meantime
+            return None
+
+    def put(self, pdb_id, download, checksum, atoms):
+        '''
+        Function to move a downloaded file into the cache together with its
+        atom table, replacing an older entry for the same ID, and evict the
+        least recently used entries if the cache is too large.
+
+        Parameters
+        ----------
+        pdb_id : *str*
+            Four character PDB ID.
+        download : *str*
+            Path of the downloaded gzipped file.
+        checksum : *str*
+            SHA-256 hex digest of the gzipped file.
+        atoms : *AtomTable*
+            Atom table parsed from the file.
+
+        Returns
+        -------
+        path : *str*
+            Path of the file in the cache.
+
+        '''
+        with self.lock:
+            old = self.find(pdb_id)
+            key = pdb_id.upper() + "_" + checksum[:16]
+            os.replace(download, self.path(key, self.extension))
+            atoms.save(self.path(key, self.extension), checksum)
+            if old is not None and old != key:
+                self.remove(old)
+            self.evict()
+            return self.path(key, self.extension)
+
+    def remove(self, key):
+        '''
+        Function to delete the files of an entry.
+        '''
+        if os.path.isfile(self.path(key, self.extension)):
+            os.remove(self.path(key, self.extension))
+        shutil.rmtree(self.path(key, self.extension + ".atoms"), ignore_errors=True)
+
+    def evict(self):
+        '''
+        Function to remove the least recently used entries until the cache
+        fits in its size limit. The newest entry is always kept.
+        '''
+        entries = self.entries()
+        total = sum(size for used, size, key in entries)
+        for used, size, key in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            self.remove(key)
+            total -= size
+
+
+class FetchError(Exception):
+    '''
+    Error raised when a PDB file cannot be fetched. The message can be shown
+    to the user as it is.
+    '''
+
+
+def download_pdb(pdb_id, cache, session=requests, base_url=PDB_URL, retries=2):
+    '''
+    Function to download the gzipped file of a PDB ID into the cache. The
+    status code is checked before anything is written, and every chunk is
+    saved as it is and fed decompressed to the stream parser in the same pass.
+    Connection errors, server errors and damaged downloads are retried.
+
+    Parameters
+    ----------
+    pdb_id : *str*
+        Four character PDB ID.
+    cache : *PDBCache*
+        Cache the file is saved in.
+    session : *requests.Session*
+        Session used for the request, so connections can be reused.
+    base_url : *str*
+        URL the file name is added to, which can point at a local server.
+    retries : *int*
+        Number of times a failed download is tried again.
+
+    Returns
+    -------
+    atoms : *AtomTable*
+        Atom table of the downloaded file.
+
+    '''
+    file_url = base_url + pdb_id + ".pdb.gz"
+    error = "Could not connect to the PDB!"
+
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(0.5 * 2**(attempt - 1))
+
+        # every download gets its own temporary file, so downloads of the same
+        # ID by other threads or processes sharing the cache never collide
+        handle, pdb_file = tempfile.mkstemp(prefix=pdb_id.upper() + "_", suffix=".part",
+                                            dir=cache.directory)
+        os.close(handle)
+        try:
+            # the response is closed on every way out, so its connection goes
+            # back to the pool even when the body is never read
+            with session.get(file_url, stream=True, timeout=30) as r:
+                if r.status_code == 404:
+                    raise FetchError("PDB file does not exist!")
+                if r.status_code != 200:
+                    error = "The PDB answered with status " + str(r.status_code) + "!"
+                    continue
+
+                parser = PDBStreamParser()
+                gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                checksum = hashlib.sha256()
+                with open(pdb_file, "wb") as pdbw:
+                    for chunk in r.iter_content(chunk_size=65536):
+                        if chunk:
+                            pdbw.write(chunk)
+                            checksum.update(chunk)
+                            parser.feed(gunzip.decompress(chunk))
+                    parser.feed(gunzip.flush())
+
+            # the atom records are parsed once for all of the tasks and saved
+            # in the cache together with the file
+            atoms = parser.close()
+            cache.put(pdb_id, pdb_file, checksum.hexdigest(), atoms)
+            return atoms
+        except requests.RequestException:
+            error = "Could not connect to the PDB!"
+        except zlib.error:
+            error = "Downloaded PDB file is damaged!"
+        finally:
+            if os.path.isfile(pdb_file):
+                os.remove(pdb_file)
+    raise FetchError(error)
+
+
+def fetch_pdb(pdb_id, cache, session=requests, base_url=PDB_URL, retries=2):
+    '''
+    Function to return the atom table of a PDB ID from the cache, downloading
+    the file first if it is not in the cache. See download_pdb for the
+    parameters.
+    '''
+    atoms = cache.get(pdb_id)
+    if atoms is None:
+        atoms = download_pdb(pdb_id, cache, session, base_url, retries)
+    return atoms
+
+
+def prefetch_pdb(pdb_id, cache, session=requests, base_url=PDB_URL, retries=2):
+    '''
+    Function to make sure a PDB ID is in the cache, downloading the file if it
+    is not, without loading its atom table. See download_pdb for the
+    parameters.
+    '''
+    if cache.touch(pdb_id) is None:
+        download_pdb(pdb_id, cache, session, base_url, retries)
+
+
+def fetch_many(pdb_ids, cache=None, workers=8, base_url=PDB_URL, retries=2, load=True):
+    '''
+    Function to fetch many PDB IDs at once. The files are downloaded by a pool
+    of threads that share one requests session, so connections to the server
+    are kept open and reused, and every file goes through the cache.
+
+    Parameters
+    ----------
+    pdb_ids : *list, str*
+        PDB IDs to fetch. Repeated IDs are only fetched once, also when they
+        are written in different case.
+    cache : *PDBCache*
+        Cache the files are looked up in and saved to.
+    workers : *int*
+        Largest number of downloads running at the same time.
+    base_url : *str*
+        URL the file names are added to, which can point at a local server.
+    retries : *int*
+        Number of times a failed download is tried again.
+    load : *bool*
+        Whether the atom tables are returned. Without them the files are only
+        put into the cache, and cached files are not read at all.
+
+    Returns
+    -------
+    atoms : *dict*
+        Atom table of every ID that was fetched, under the IDs as given, or
+        nothing if load is False.
+    errors : *dict*
+        Error message of every ID that could not be fetched, downloaded or
+        parsed.
+
+    '''
+    if cache is None:
+        cache = PDBCache()
+    pdb_ids = list(pdb_ids)
+    unique = list(dict.fromkeys(pdb_id.upper() for pdb_id in pdb_ids))
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    fetched = {}
+    failed = {}
+    function = fetch_pdb if load else prefetch_pdb
+    with session, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(function, pdb_id, cache, session, base_url, retries): pdb_id
+                   for pdb_id in unique}
+        for future in as_completed(futures):
+            # any error, such as a file that cannot be parsed or a full disk,
+            # only loses the ID it happened to
+            try:
+                if load:
+                    fetched[futures[future]] = future.result()
+                else:
+                    future.result()
+            except Exception as error:
+                failed[futures[future]] = str(error)
+
+    atoms = {pdb_id: fetched[pdb_id.upper()] for pdb_id in pdb_ids
+             if pdb_id.upper() in fetched}
+    errors = {pdb_id: failed[pdb_id.upper()] for pdb_id in pdb_ids
+              if pdb_id.upper() in failed}
+    return atoms, errors
+
+
+def residue_hydropathy(atoms):
+    '''
+    Function to look up the octanol and interface scale values developed by
+    Wimley and White, 1996, of every amino acid in a structure, in the order
+    of the carbon alpha atoms of its first model. Residues that are not amino
+    acids are left out.
+
+    Parameters
+    ----------
+    atoms : *AtomTable*
+        Atom table of the PDB file.
+
+    Returns
+    -------
+    octanol : *array, float*
+        Octanol scale value of every residue.
+    interface : *array, float*
+        Interface scale value of every residue.
+
+    '''
+    # dictionary for the conversion of amino acids to FASTA format
+    fasta = []
+    aminoacid = {}
+    aminoacid["ALA"] = "A"
+    aminoacid["CYS"] = "C"
+    aminoacid["ASP"] = "D"
+    aminoacid["GLU"] = "E"
+    aminoacid["PHE"] = "F"
+    aminoacid["GLY"] = "G"
+    aminoacid["HIS"] = "H"
+    aminoacid["ILE"] = "I"
+    aminoacid["LYS"] = "K"
+    aminoacid["LEU"] = "L"
+    aminoacid["MET"] = "M"
+    aminoacid["MSE"] = "M"
+    aminoacid["ASN"] = "N"
+    aminoacid["PRO"] = "P"
+    aminoacid["GLN"] = "Q"
+    aminoacid["ARG"] = "R"
+    aminoacid["SER"] = "S"
+    aminoacid["THR"] = "T"
+    aminoacid["VAL"] = "V"
+    aminoacid["TRP"] = "W"
+    aminoacid["UNK"] = "X"
+    aminoacid["TYR"] = "Y"
+
+    # parses out all carbon alpha atoms for simplicity
+    # if the residue is in the amino acid list, it will be converted
+    # to a fasta format and saved to fasta list
+    for res_name in atoms.res_name[atoms.select("ATOM", name="CA", model=0)]:
+        if res_name.decode() in aminoacid:
+            fasta.append(aminoacid[res_name.decode()].strip())
+
+    # dictionary with the octanol values for every fasta amino acid
+    octanol = []
+    octscale = {}
+    octscale["A"] = "0.5"
+    octscale["R"] = "1.81"
+    octscale["N"] = "0.85"
+    octscale["D"] = "3.64"
+    octscale["C"] = "-0.02"
+    octscale["Q"] = "0.77"
+    octscale["E"] = "3.63"
+    octscale["G"] = "1.15"
+    octscale["H"] = "2.33"
+    octscale["I"] = "-1.12"
+    octscale["L"] = "-1.25"
+    octscale["M"] = "-0.67"
+    octscale["F"] = "-1.71"
+    octscale["P"] = "0.14"
+    octscale["S"] = "0.46"
+    octscale["T"] = "0.25"
+    octscale["W"] = "-2.09"
+    octscale["Y"] = "-0.71"
+    octscale["V"] = "-0.46"
+
+    # dictionary with the interface values for every fasta amino acid
+    interface = []
+    intscale = {}
+    intscale["A"] = "0.17"
+    intscale["R"] = "0.81"
+    intscale["N"] = "0.42"
+    intscale["D"] = "1.23"
+    intscale["C"] = "-0.24"
+    intscale["Q"] = "0.58"
+    intscale["E"] = "2.02"
+    intscale["G"] = "0.01"
+    intscale["H"] = "0.96"
+    intscale["I"] = "-0.31"
+    intscale["L"] = "-0.56"
+    intscale["M"] = "-0.23"
+    intscale["F"] = "-1.13"
+    intscale["P"] = "0.45"
+    intscale["S"] = "0.13"
+    intscale["T"] = "0.14"
+    intscale["W"] = "-1.85"
+    intscale["Y"] = "-0.94"
+    intscale["V"] = "-0.07"
+
+    # iterates thrugh fasta list and if the letter is in the octscale and intscale
+    # dictionary then the values are recorded in the appropriate list
+    for letter in fasta:
+        if letter in octscale and intscale:
+            octanol.append(float(octscale[letter].strip()))
+            interface.append(float(intscale[letter].strip()))
+
+    return np.array(octanol), np.array(interface)
+
+
+def sliding_mean(values, window):
+    '''
+    Function to average every run of window consecutive values, using the
+    differences of a running sum so each average costs the same no matter how
+    long the window is.
+
+    Parameters
+    ----------
+    values : *list, float*
+        The values to average.
+    window : *int*
+        Number of values in every window.
+
+    Returns
+    -------
+    averages : *array, float*
+        The len(values) - window + 1 window averages, empty if there are fewer
+        values than the window.
+
+    '''
+    values = np.asarray(values, dtype=float)
+    if window < 1 or len(values) < window:
+        return np.zeros(0)
+    total = np.concatenate(([0.0], np.cumsum(values)))
+    return (total[window:] - total[:-window]) / window
+
+
+def hydropathy_profiles(sequences, window=19):
+    '''
+    Function to compute the sliding window averages of many sequences at
+    once. The values of all sequences are put end to end and summed once, and
+    the averages are taken from the running sum as for sliding_mean.
+
+    Parameters
+    ----------
+    sequences : *list, array*
+        Scale values of the residues of every sequence.
+    window : *int*
+        Number of residues in every window.
+
+    Returns
+    -------
+    profiles : *array, float*
+        A (sequences, windows) array of window averages, padded with NaN
+        after the last window of sequences shorter than the longest one.
+    counts : *array, int*
+        Number of windows of every sequence.
+
+    '''
+    lengths = np.array([len(values) for values in sequences], dtype=np.int64)
+    counts = np.maximum(lengths - window + 1, 0)
+    if not len(sequences) or counts.max() == 0:
+        return np.full((len(sequences), 0), np.nan), counts
+
+    total = np.concatenate(([0.0], np.cumsum(np.concatenate(
+        [np.asarray(values, dtype=float) for values in sequences]))))
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    index = np.arange(counts.max())
+    valid = index[None, :] < counts[:, None]
+    first = np.where(valid, offsets[:, None] + index[None, :], 0)
+    profiles = (total[first + window] - total[first]) / window
+    profiles[~valid] = np.nan
+    return profiles, counts
+
+
+def plot_hydropathy(xaxis, octanol, interface, label, window):
+    '''
+    Function to draw the hydrophobicity graph into a PNG image in memory. The
+    figure is drawn with the Agg canvas directly instead of pyplot, so no
+    global figure state is kept between graphs and graphs can be drawn from
+    several threads.
+
+    Parameters
+    ----------
+    xaxis : *array, float*
+        Residue number at the middle of every window.
+    octanol : *array, float*
+        Average octanol scale value of every window.
+    interface : *array, float*
+        Average interface scale value of every window.
+    label : *str*
+        Label of the protein for the title.
+    window : *int*
+        Number of residues in every window.
+
+    Returns
+    -------
+    png : *bytes*
+        The graph as a 576x432 PNG image.
+
+    '''
+    # matplotlib is only imported the first time a graph is drawn
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure(figsize=(8, 6), dpi=72)
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    axes.plot(xaxis, octanol, 'r-', label="Octanol Scale")
+    axes.plot(xaxis, interface, 'b:', label="Interface Scale")
+    axes.plot(xaxis, octanol - interface, 'g--', label="Octanol-Interface Scale")
+    axes.set_ylabel("Total free energy (kcal/mol)", fontsize=16)
+    axes.set_xlabel("Residue Number in " + str(window) + " AA Window", fontsize=16)
+    axes.set_title("Hydrophobicity Scale of " + label)
+    axes.legend()
+    png = io.BytesIO()
+    figure.savefig(png, format="png")
+    return png.getvalue()
+
+
+class TaskCancelled(Exception):
+    '''
+    Error raised inside a task when the user cancels it.
+    '''
+
+
+class Analysis:
+    '''
+    Class that contains the calculations on a parsed PDB file. It does not
+    use Tk, so the same calculations run in the GUI and from the command line.
+    '''
+
+    # short names of the tasks, in the order of the dropdown menu
+    tasks = ("hbond", "radius", "hydropathy", "ss", "close", "disulfide")
+
+    # fraction of the running task that is done, and an event that is set
+    # to stop the task early
+    fraction = 0.0
+    cancel_event = None
+    # number of residues in the sliding window of the hydropathy graph
+    window = 19
+    # whether graphs are saved to the working directory as well
+    save_plots = True
+    # shortest and longest SG-SG distance in angstroms of a disulfide bond
+    disulfide_range = (2.0, 2.1)
+    # whether the radius of gyration only uses the carbon alpha atoms
+    ca_only = False
+    # domains the radius of gyration is also calculated for, see parse_domain
+    domains = ()
+
+    def __init__(self, atoms, pdb_label, window=19, ca_only=False, domains=(),
+                 disulfide_range=(2.0, 2.1)):
+        '''
+        Function to set up the calculations for one PDB file.
+
+        Parameters
+        ----------
+        atoms : *AtomTable*
+            Atom table of the PDB file.
+        pdb_label : *str*
+            Label the output files are named with, usually the PDB ID.
+        window : *int*
+            Number of residues in the sliding window of the hydropathy graph.
+        ca_only : *bool*
+            Whether the radius of gyration only uses the carbon alpha atoms.
+        domains : *list, tuple*
+            Domains the radius of gyration is also calculated for, see
+            parse_domain.
+        disulfide_range : *tuple, float*
+            Shortest and longest SG-SG distance in angstroms of a disulfide
+            bond.
+
+        Returns
+        -------
+        None.
+
+        '''
+        self.atoms = atoms
+        self.pdb = atoms.data
+        self.pdb_label = pdb_label
+        self.window = window
+        self.ca_only = ca_only
+        self.domains = domains
+        self.disulfide_range = disulfide_range
+
+    def run_task(self, task):
+        '''
+        Function to run one task by its short name and return the summary
+        message of the result.
 
+        Parameters
+        ----------
+        task : *str*
+            One of the names in Analysis.tasks.
 
-class ImageLabel(Label):
-    """
-    a label that displays images, and plays them if they are gifs.
-    Function was taken from https://stackoverflow.com/a/43770948
-    """
+        Returns
+        -------
+        message : *str*
+            Summary of the result and where the output was saved.
 
-    def load(self, im):
         '''
-        Will load image for gif
-        
+        if task == "hbond":
+            self.h_bond(self.pdb)
+            return str("File saved in directory as " + self.h_label +
+                       self.model_text("Hydrogen bonds", self.h_model_counts))
+        if task == "radius":
+            self.radius(self.pdb)
+            return self.output_text
+        if task == "hydropathy":
+            self.hydropathy(self.pdb)
+            if self.hydro_file is None:
+                return "Graph of the hydrophobicity is ready"
+            return "Graph saved in directory as " + self.hydro_file
+        if task == "ss":
+            self.ss(self.pdb)
+            return self.out_entry
+        if task == "close":
+            self.close(self.pdb)
+            return self.out_msg
+        if task == "disulfide":
+            self.disulfide(self.pdb)
+            return self.out_msg
+        raise ValueError("Unknown task " + task)
+
+    def progress(self, fraction):
+        '''
+        Function the tasks call as they work with the fraction of the work
+        done. If the task was cancelled it is stopped here.
+
         Parameters
         ----------
-        
-        im: *file*
-            Image to animate
-        
+        fraction : *float*
+            Fraction of the task done, from 0 to 1.
+
         Returns
-        ------
-        
+        -------
+        None.
+
+        '''
+        self.fraction = fraction
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise TaskCancelled()
+
+    def model_counts(self, rows):
+        '''
+        Function to count how many of the found atoms or pairs, given by the
+        row of their first atom, are in every model of the file.
+        '''
+        return np.bincount(self.atoms.model[rows], minlength=self.atoms.models())
+
+    def write_model(self, f, row, last):
+        '''
+        Function to write a MODEL line into an output file before the first
+        pair of every model, if the file has several models.
+
+        Parameters
+        ----------
+        f : *file*
+            The output file.
+        row : *int*
+            Row of the first atom of the pair about to be written.
+        last : *int*
+            Model of the pair written before, or None.
+
+        Returns
+        -------
+        model : *int*
+            Model of the atom.
+
+        '''
+        model = int(self.atoms.model[row])
+        if model != last and self.atoms.models() > 1:
+            f.write("MODEL " + str(model + 1) + "\n")
+        return model
+
+    def model_text(self, name, values):
+        '''
+        Function to describe how a result varies over the models of an
+        ensemble, or nothing if the file has a single model.
+
+        Parameters
+        ----------
+        name : *str*
+            Name of the result.
+        values : *array*
+            Result of every model.
+
+        Returns
+        -------
+        text : *str*
+            Line with the mean, standard deviation, smallest and largest value.
+
+        '''
+        if len(values) < 2:
+            return ""
+        return str("\n" + name + " over " + str(len(values)) + " models: mean %.3f, "
+                   "std %.3f, min %.3f, max %.3f" % (np.mean(values), np.std(values),
+                                                     np.min(values), np.max(values)))
+
+    def model_summary(self, name, values):
+        '''
+        Function to return the number of models and the mean and standard
+        deviation of a result over them as summary columns, or no columns if
+        the file has a single model.
+        '''
+        if len(values) < 2:
+            return {}
+        return {"models": len(values), name + "_mean": float(np.mean(values)),
+                name + "_std": float(np.std(values))}
+
+    def task_summary(self, task):
+        '''
+        Function to return the main numbers found by a task that was run, as
+        columns of the batch summary table.
+
+        Parameters
+        ----------
+        task : *str*
+            One of the names in Analysis.tasks.
+
+        Returns
+        -------
+        columns : *dict*
+            Column names and values.
+
+        '''
+        if task == "hbond":
+            return dict({"hbonds": self.h_count},
+                        **self.model_summary("hbonds", self.h_model_counts))
+        if task == "radius":
+            x, y, z = self.center_of_mass
+            summary = {"com_x": x, "com_y": y, "com_z": z,
+                       "radius_gyration": self.radius_gyration}
+            for label, (center, radius) in self.group_radii.items():
+                summary["radius_gyration " + label] = radius
+            summary.update(self.model_summary("radius_gyration", self.model_radii))
+            return summary
+        if task == "hydropathy":
+            return {"hydropathy_plot": self.hydro_file or ""}
+        if task == "ss":
+            return {"helices": self.helix_count, "sheets": self.sheet_count,
+                    "strands": self.strand_count}
+        if task == "close":
+            return dict({"close_contacts": self.cc_count},
+                        **self.model_summary("close_contacts", self.cc_model_counts))
+        if task == "disulfide":
+            return dict({"disulfides": self.ds_count},
+                        **self.model_summary("disulfides", self.ds_model_counts))
+        raise ValueError("Unknown task " + task)
+
+    def get_coordinates(self, line):
+        '''
+        Function to take in a line from the PDB file and return the xyz coordinates
+        in float form.
+
+        Parameters
+        ----------
+        line : *str*
+            String of chracaters from the PDB file.
+
+        Returns
+        -------
+        [x, y, z]: *list*
+            List of xyz coordinates for a atom.
+
+        '''
+        x = float(line[30:38])
+        y = float(line[38:46])
+        z = float(line[46:54])
+        return [x, y, z]
+
+    def calc_atom_dist(self, atom1_xyz, atom2_xyz):
+        '''
+        Function to calculate the distance between two atoms based on their xyz coordinates.
+
+
+        Parameters
+        ----------
+        atom1_xyz : *list, float*
+            A series of numbers pertaining to the xyz coordinates of an atom.
+        atom2_xyz : *list, float*
+            A series of numbers pertaining to the xyz coordinates of an atom..
+
+        Returns
+        -------
+        dist : *float*
+            The distance between two atoms in angstroms.
+
+        '''
+        atom1_x, atom1_y, atom1_z = atom1_xyz
+        atom2_x, atom2_y, atom2_z = atom2_xyz
+
+        dist = math.sqrt((atom1_x - atom2_x)**2 + (atom1_y - atom2_y)**2 +
+                         (atom1_z - atom2_z)**2)
+        return dist
+
+    def h_bond(self, file):
+        '''
+        Function to calculate the hydrogen bond partners in a given PDB file.
+        Function will parse out all atoms ending in either O (oxygen) or N (nitrogen).
+        File will then open calculate the distance between every oxygen atom and nitrogen
+        atom and if the distance is less than or equal to 3.2 angstroms then the atoms
+        will be declared hydrogen bond partners and written to a text file.
+
+        Parameters
+        ----------
+        file: *txt file*
+            The pdb file that was obtained by fetching the internet or through the 
+            file explorer in readlines() mode.
+
+        Returns
+        -------
         None
         '''
-        if isinstance(im, str):
-            im = Image.open(im)
-        self.loc = 0
-        self.frames = []
+        # selects the oxygen and nitrogen atoms from the parsed atom table
+        oxygen = self.atoms.select("ATOM", name="O")
+        nitrogen = self.atoms.select("ATOM", name="N")
+        count = 1
 
-        try:
-            for i in count(1):
-                self.frames.append(ImageTk.PhotoImage(im.copy()))
-                im.seek(i)
-        except EOFError:
-            pass
+        # opens output text file
+        self.h_label = "H_bond_" + self.pdb_label + ".txt"
+        self.h_file = open(self.h_label, "w")
 
-        try:
-            self.delay = im.info['duration']
-        except:
-            self.delay = 100
+        # indexes the nitrogen atoms in a cell list so each oxygen atom is
+        # only compared against the nitrogen atoms close to it in the same model
+        n_index = CellList(self.atoms.xyz[nitrogen], 3.2, self.atoms.model[nitrogen])
 
-        if len(self.frames) == 1:
-            self.config(image=self.frames[0])
-        else:
-            self.next_frame()
+        # if the distance is less than or equal to 3.2 the two atoms are added to the out
+        # put text file and the counter is updated
+        pairs = n_index.query(self.atoms.xyz[oxygen], 3.2, 10000,
+                              progress=self.progress, groups=self.atoms.model[oxygen])
+        model = None
+        for i, w in zip(*pairs):
+            model = self.write_model(self.h_file, oxygen[i], model)
+            entry = str("Pair #" + str(count) + '\n' +
+                        self.atoms.line(oxygen[i]).strip() + '\n' +
+                        self.atoms.line(nitrogen[w]).strip() + '\n')
+            self.h_file.write(entry)
+            count += 1
+        self.h_count = count - 1
+        self.h_model_counts = self.model_counts(oxygen[pairs[0]])
+        self.h_file.close()
 
-    def unload(self):
+    def radius(self, file):
         '''
-        Function to configure the image.
+        Function to generate the mass weighted center of mass and radius of gyration
+        of a given protein, from all of its atoms or only the carbon alpha atoms.
+
+        Parameters
+        ----------
+        file: *txt file*
+            The pdb file that was obtained by fetching the internet or through the 
+            file explorer in readlines() mode..
 
         Returns
         -------
         None.
 
         '''
-        self.config(image="")
-        self.frames = None
 
-    def next_frame(self):
+        # selects every protein atom, or only the carbon alpha atoms, of every
+        # model, the models of an ensemble do not need to have the same atoms
+        rows = self.atoms.select("ATOM", name="CA" if self.ca_only else None)
+        if not len(rows):
+            self.center_of_mass = (float("nan"),) * 3
+            self.radius_gyration = float("nan")
+            self.group_radii = {}
+            self.model_radii = np.zeros(0)
+            self.output_text = "There are no atoms to calculate the radius of gyration of!"
+            return
+
+        # atoms are grouped into the whole protein, every chain and every
+        # domain, an atom can be in several domains
+        chains, chain_codes = np.unique(self.atoms.chain[rows], return_inverse=True)
+        labels = ["protein"] + ["chain " + (chain.decode().strip() or "-") for chain in chains]
+        members = [np.arange(len(rows)), np.arange(len(rows))]
+        groups = [np.zeros(len(rows), dtype=np.int64), chain_codes.reshape(-1) + 1]
+        for label, chain, first, last in self.domains:
+            inside = np.flatnonzero((self.atoms.chain[rows] == chain.encode()) &
+                                    (self.atoms.res_seq[rows] >= first) &
+                                    (self.atoms.res_seq[rows] <= last))
+            members.append(inside)
+            groups.append(np.full(len(inside), len(labels)))
+            labels.append("domain " + label)
+        members = np.concatenate(members)
+
+        # mass weighted center of mass and root mean square radius of gyration
+        # of every group of every model in a single pass, the groups of one
+        # model follow each other
+        models = self.atoms.models()
+        masses = atom_masses(self.atoms, rows)
+        groups = self.atoms.model[rows][members] * len(labels) + np.concatenate(groups)
+        centers, radii = radius_of_gyration(self.atoms.xyz[rows][members], masses[members],
+                                            groups, models * len(labels))
+        centers = centers.reshape(models, len(labels), 3)
+        radii = radii.reshape(models, len(labels))
+
+        # the center and radii of the first model are reported, and the
+        # radius of gyration of the whole protein in every model
+        self.center_of_mass = tuple(float(c) for c in centers[0, 0])
+        self.radius_gyration = float(radii[0, 0])
+        self.model_radii = radii[:, 0]
+        self.group_radii = {label: (tuple(float(c) for c in center), float(radius))
+                            for label, center, radius in zip(labels[1:], centers[0, 1:],
+                                                             radii[0, 1:])}
+
+        self.output_text = str("Center of Mass = " + str(self.center_of_mass
+                                                         ) + '\n' + "Radius of Gyration = " + str(
+                                                             str(self.radius_gyration) + "Å"))
+        # every chain and domain is listed if there is more than the protein
+        if len(chains) > 1 or self.domains:
+            for label, (center, radius) in self.group_radii.items():
+                self.output_text += str("\n" + label + ": Center of Mass = " + str(center) +
+                                        ", Radius of Gyration = " + str(radius) + "Å")
+        self.output_text += self.model_text("Radius of Gyration", self.model_radii)
+
+    def hydropathy(self, file):
         '''
-        Function to loop through different frames in the image.
+        Function to calculate the hydrophobicity of a given protein in
+        terms of the octanol and interface scale developed by Wimley and White, 1996.
+        Function will graph the hydrophobicity in the different scales in a sliding 
+        window to show how the hydrophobicity of a region changes.
+
+        Parameters
+        ----------
+        file: *txt file*
+            The pdb file that was obtained by fetching the internet or through the 
+            file explorer in readlines() mode.
 
         Returns
         -------
         None.
 
         '''
-        if self.frames:
-            self.loc += 1
-            self.loc %= len(self.frames)
-            self.config(image=self.frames[self.loc])
-            self.after(self.delay, self.next_frame)
+        self.hydro_label = self.pdb_label
+        octanol, interface = residue_hydropathy(self.atoms)
 
+        # calculates the average octanol and interface values for every
+        # window of residues, and the residue number at the middle of each
+        average_octanol_np = sliding_mean(octanol, self.window)
+        average_interface_np = sliding_mean(interface, self.window)
+        average_scale = average_octanol_np - average_interface_np
+        xaxis = np.arange(len(average_scale)) + (self.window + 1) / 2
+
+        # graphs the scale in memory, and saves it to the working directory
+        # when plots are saved
+        self.hydro_png = plot_hydropathy(xaxis, average_octanol_np, average_interface_np,
+                                         self.hydro_label, self.window)
+        self.hydro_file = None
+        if self.save_plots:
+            self.hydro_file = "Hydrophobicity_Scale_" + self.hydro_label + ".png"
+            with open(self.hydro_file, "wb") as f:
+                f.write(self.hydro_png)
 
-def loaddict():
-    '''
-    Function to load the saved login database from the saved pickle 
-    format.
+    def ss(self, file):
+        '''
+        Will take in a pdb file and parse the data set to return a list of secondary
+        structures in the protein.
 
-    **Parameters**
+        Parameters
+        ----------
+        file: *txt file*
+            The pdb file that was obtained by fetching the internet or through the 
+            file explorer in readlines() mode.
 
-    None
+        Returns
+        -------
+        None.
 
-    **Returns**
+        '''
+        self.sf_label = "secondary_structure_" + self.pdb_label + ".txt"
 
-    dictAdmin: *dict*
-        Dictionary containing encrypted login info
+        # residue ranges of the helices and sheet strands, and the structure
+        # of every residue, so self.ss_codes[self.atoms.residue[i]] is the
+        # structure of atom i
+        self.ss_intervals = secondary_structure(self.atoms)
+        self.ss_codes = structure_codes(self.atoms, self.ss_intervals)
+
+        kind = self.ss_intervals["kind"]
+        self.helix_count = int(np.count_nonzero(kind == "H"))
+        self.strand_count = int(np.count_nonzero(kind == "E"))
+        self.sheet_count = len(np.unique(self.ss_intervals["sheet"][kind == "E"]))
+
+        # the file is written again on every run, with the records and the
+        # structure of the residues of every chain of the first model
+        with open(self.sf_label, "w") as sf:
+            for entry in self.atoms.records("HELIX", "SHEET"):
+                sf.write(str(entry) + '\n')
+            first = np.unique(self.atoms.residue, return_index=True)[1]
+            first = np.sort(first[self.atoms.model[first] == 0])
+            for chain in dict.fromkeys(self.atoms.chain[first]):
+                residues = self.atoms.residue[first[self.atoms.chain[first] == chain]]
+                sf.write("Chain " + (chain.decode().strip() or "-") + ": " +
+                         "".join(self.ss_codes[residues]) + '\n')
+
+        self.out_entry = str("There are " + str(self.helix_count) + " alpha helices and " +
+                             str(self.sheet_count) + " beta sheets with " +
+                             str(self.strand_count) + " strands! \nFull file saved as " +
+                             self.sf_label)
 
-    '''
-    with open("admin.txt", "rb") as dictAdmin:
-        return pickle.load(dictAdmin)
+    def close(self, file):
+        '''
+        Function to find all close contacts in a given PDB file. Every pair of
+        atoms on different residues that are within 2.7 angstroms of each other
+        is written to a text file.
 
+        Parameters
+        ----------
+        file: *txt file*
+            The pdb file that was obtained by fetching the internet or through the 
+            file explorer in readlines() mode.
 
-def savedict(dictAdmin):
-    '''
-    Function to save the login database from in a saved pickle 
-    format.
+        Returns
+        -------
+        None.
 
-    **Parameters**
+        '''
+        atoms = self.atoms.select("ATOM")
 
-    dictAdmin: *dict*
-        Dictionary containing encrypted login info
+        self.cc_label = "Close_contacts_" + self.pdb_label + ".txt"
 
-    **Returns**
+        self.close_contacts = open(self.cc_label, "w")
+        count = 0
+        # Ignoring molecules on the same residue, and pairs from different models
+        pairs = find_close_contacts(self.atoms.xyz[atoms],
+                                    self.atoms.residue[atoms], 2.7, self.progress,
+                                    self.atoms.model[atoms])
+        model = None
+        for i, j in zip(*pairs):
+            model = self.write_model(self.close_contacts, atoms[i], model)
+            entry = str("Pair #" + str(count) + '\n' +
+                        self.atoms.line(atoms[i])+'\n' +
+                        self.atoms.line(atoms[j])+'\n')
+            self.close_contacts.write(entry)
+            count += 1
+        self.cc_count = count
+        self.cc_model_counts = self.model_counts(atoms[pairs[0]])
+        self.out_msg = str("There are " + str(count) + " van der Waals contacts!" +
+                           '\nFull details saved as ' + self.cc_label +
+                           self.model_text("Contacts", self.cc_model_counts))
 
-    None
+        self.close_contacts.close()
 
+    def disulfide(self, file):
+        '''
+        Function to find the disulfide bonds between cysteines, see
+        find_disulfides, and write every bond with its length and
+        CB-SG-SG-CB dihedral angle score to a text file.
 
-    '''
+        Parameters
+        ----------
+        file: *txt file*
+            The pdb file that was obtained by fetching the internet or through the 
+            file explorer in readlines() mode.
 
-    pickle.dump(dictAdmin, open("admin.txt", "wb"))
+        Returns
+        -------
+        None.
 
+        '''
+        self.ds_label = "Disulfide_bonds_" + self.pdb_label + ".txt"
+        self.bonds = find_disulfides(self.atoms, *self.disulfide_range)
+        count = len(self.bonds["i"])
 
-class Application(Frame):
+        # the file is only written if bonds were found
+        self.ds_count = count
+        self.ds_model_counts = self.model_counts(self.bonds["i"])
+        if count == 0:
+            if os.path.isfile(self.ds_label):
+                os.remove(self.ds_label)
+            self.out_msg = str(
+                "There are no disulfide bonds in this protein!")
+            return
+
+        with open(self.ds_label, "w") as disulfide_txt:
+            model = None
+            for n, (atom1, atom2, dist, angle, score) in enumerate(zip(
+                    self.bonds["i"], self.bonds["j"], self.bonds["distance"],
+                    self.bonds["dihedral"], self.bonds["score"])):
+                model = self.write_model(disulfide_txt, atom1, model)
+                entry = str("Pair #" + str(n) + '\n' +
+                            self.atoms.line(atom1)+'\n' +
+                            self.atoms.line(atom2)+'\n' +
+                            "Distance = %.3f A, CB-SG-SG-CB dihedral = %.1f, score = %.2f\n"
+                            % (dist, angle, score))
+                disulfide_txt.write(entry)
+
+        self.out_msg = str("There are " + str(count) + " disulfide bonds!" +
+                           '\nFull details saved as ' + self.ds_label +
+                           self.model_text("Disulfide bonds", self.ds_model_counts))
+
+
+class Application(Frame, Analysis):
     '''
     Class that contains the functions and set up for the various windows within
     the GUI.
     '''
 
+    # graphs are shown from memory, the popup window has a button to save them
+    save_plots = False
+
     def __init__(self, master=None):
         '''
         Function to initialize a series of variables, including
@@ -182,6 +2663,9 @@ class Application(Frame):
         self.master.resizable(False, False)
         self.master.title('PDB Processing Program')
         self.bg = PhotoImage(file="bg_img.png")
+        self.cache = PDBCache()
+        self.accounts = AccountStore()
+        self.task_thread = None
         self.grid()
         self.welcome_setup()
 
@@ -261,26 +2745,96 @@ class Application(Frame):
 
         **Parameters**
 
-        self: *object*
+        self: *object*
+
+        **Returns**
+
+        None.
+
+        '''
+        # Hash the username using sha512 encoding
+        hashed_user = hashlib.sha512(self.username.get().encode()).hexdigest()
+
+        # looks up the saved password of the username, and then will
+        # check to see if the stored salted password matches the entered password
+        # the password check runs in a worker thread so the window does not
+        # freeze while bcrypt works
+        saved = self.accounts.get(hashed_user)
+        if saved is None:
+            self.login_result(False)
+        else:
+            self.run_in_background(self.canvas, (self.enter_button, self.account_button),
+                                   (305, 320), self.login_result,
+                                   bcrypt.checkpw, self.password.get().encode(), saved)
+
+    def login_result(self, match):
+        '''
+        Function that moves on to the next screen once the password was checked,
+        or shows an error message if it was wrong.
+
+        Parameters
+        ----------
+        match : *bool*
+            Whether the entered password matches the saved one.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if match:
+            self.second_setup()
+        else:
+            mb.showerror("Error", "Username or Password is incorrect")
+
+    def run_in_background(self, window, buttons, position, done, function, *args):
+        '''
+        Function to run a slow function, like a bcrypt hash, in a worker thread.
+        The buttons are disabled and a spinner turns on the window until it is
+        done, then done is called with its result from the Tk main loop.
 
-        **Returns**
+        Parameters
+        ----------
+        window : *Canvas*
+            Canvas of the current screen the spinner is drawn on.
+        buttons : *tuple, Button*
+            Buttons to disable while the function runs.
+        position : *tuple, int*
+            Where the spinner is placed on the canvas.
+        done : *function*
+            Called with the result of the function.
+        function : *function*
+            The slow function, called with args.
 
+        Returns
+        -------
         None.
 
         '''
-        # Load in saved dictionary
-        dictAdmin = loaddict()
-
-        # Hash the username using sha512 encoding
-        hashed_user = hashlib.sha512(self.username.get().encode()).hexdigest()
-
-        # checks if the username entered matches the saved username, and then will
-        # check to see if the stored salted password matches the entered password
-        if any([True for k, v in dictAdmin.items() if k == hashed_user and checkpw(
-                self.password.get().encode(), v)]):
-            self.second_setup()
-        else:
-            mb.showerror("Error", "Username or Password is incorrect")
+        result = []
+        worker = threading.Thread(target=lambda: result.append(function(*args)),
+                                  daemon=True)
+        for button in buttons:
+            button.config(state=DISABLED)
+        spinner = ttk.Progressbar(self, mode="indeterminate", length=150)
+        window.create_window(position[0], position[1], anchor="nw", window=spinner)
+        spinner.start(10)
+
+        # polls the worker from the Tk main loop until it is finished
+        def check():
+            if worker.is_alive():
+                self.after(50, check)
+                return
+            spinner.destroy()
+            for button in buttons:
+                button.config(state=NORMAL)
+            if result:
+                done(result[0])
+            else:
+                mb.showerror("Error", "The password could not be checked.")
+
+        worker.start()
+        self.after(50, check)
 
     def create_account(self, master=None):
         '''
@@ -350,12 +2904,11 @@ class Application(Frame):
 
     def check_account(self):
         '''
-        Function begins by checking the user's directory to see if the admin
-        database exists, if it does then the dictionary is loaded, if it does
-        not exist then the dictionary is created. Function will use the bcrypt.checkpw
-        function to see if the two passwords match. If they match the window will be 
-        destroyed and the user will be prompted to log in on the main screen.
-        If they do not match an error message will appear.
+        Function will first see if the two passwords match. If they match the
+        password is hashed in the background and the account is added to the
+        account database, the window will be destroyed and the user will be
+        prompted to log in on the main screen. If they do not match, or the
+        username is taken, an error message will appear.
 
         Parameters
         ----------
@@ -367,35 +2920,51 @@ class Application(Frame):
 
         '''
 
-        if os.path.isfile('admin.txt'):
-            dictAdmin = loaddict()
-        else:
-            dictAdmin = {}
+        # if the two passwords do not match error message pops up, checked
+        # before hashing so an account costs a single bcrypt hash
+        if self.new_password.get() != self.password_confirm.get():
+            mb.showerror("Error", "Passwords Do Not Match")
+            return
 
-        # hashing username and password
-        hashed_passwd = hashpw(self.new_password.get().encode(), gensalt())
+        # hashing username and password, the salted hash is made in a worker
+        # thread so the window does not freeze
         hashed_user = hashlib.sha512(self.username.get().encode()).hexdigest()
+        self.run_in_background(self.newWindow, (self.confirm,), (305, 370),
+                               lambda hashed_passwd: self.save_account(hashed_user, hashed_passwd),
+                               bcrypt.hashpw, self.new_password.get().encode(), bcrypt.gensalt())
 
-        # checks to see if hashed+salted passwords match each other
-        # if they match, screen resets to log in screen
-        if checkpw(self.password_confirm.get().encode(), hashed_passwd):
-            dictAdmin[hashed_user] = hashed_passwd
-            savedict(dictAdmin)
-            mb.showinfo('Account Created', 'Please log in!')
-            self.newWindow.destroy()
-            self.welcome_setup()
-
-        # if they do not error message pops up
-        if not checkpw(self.password_confirm.get().encode('utf8'), hashed_passwd):
-            mb.showerror("Error", "Passwords Do Not Match")
+    def save_account(self, hashed_user, hashed_passwd):
+        '''
+        Function to save the new account once its password is hashed. The
+        screen then resets to the log in screen.
+
+        Parameters
+        ----------
+        hashed_user : *str*
+            The hashed username.
+        hashed_passwd : *bytes*
+            The salted password hash.
+
+        Returns
+        -------
+        None.
+
+        '''
+        if not self.accounts.add(hashed_user, hashed_passwd):
+            mb.showerror("Error", "Username already exists")
+            return
+        mb.showinfo('Account Created', 'Please log in!')
+        self.newWindow.destroy()
+        self.welcome_setup()
 
     def fetch_file(self):
         '''
-        Function will search the internet for the desired PDB file by following
-        the URL listed. With the file open, it will be downloaded in chunks and
-        saved to a pdb file. The file will then be read and if one of the first
-        few lines contains the error message then the file will be deleted and
-        an error message will appear. If no error message is present then the 
+        Function will first look for the desired PDB file in the local cache,
+        and otherwise search the internet for it by following
+        the URL listed. If the server does not answer with the file an error
+        message will appear. Otherwise the gzipped file is downloaded in chunks,
+        and every chunk is saved and fed decompressed to the parser as it arrives.
+        Once the download is done the file is added to the cache and the
         dropdown function will be called.
 
         Parameters
@@ -405,51 +2974,35 @@ class Application(Frame):
 
         Returns
         -------
-        pdb : *file*
+        pdb : *array, uint8*
             DESCRIPTION the PDB file downloaded.
 
         '''
-        # defines download url
-        file_url = "https://files.rcsb.org/download/" + self.tempfile.get() + ".pdb"
-
         self.pdb_label = self.tempfile.get()
 
-        r = requests.get(file_url, stream=True)
-        pdb_file = self.tempfile.get() + ".pdb"
-
-        # opens blank file and fills it with downloaded data
-        with open(pdb_file, "wb") as self.pdb:
-            for chunk in r.iter_content(chunk_size=(1000)):
-                if chunk:
-                    self.pdb.write(chunk)
-
-        # If file does not exist it be removed
-        count = 0
-        error_msg = "    <title>404 Not Found</title>"
-        with open(pdb_file, "r") as pdbr:
-            pdb_readlines = pdbr.readlines()
-            for line in pdb_readlines:
-                if error_msg in line:
-                    count += 1
-                    break
-
-        if count > 0:
-            os.remove(pdb_file)
-            mb.showerror("Error", "PDB file does not exist!")
-
-        if count == 0:
-            self.dropdown()
-
-        # opens file and reads lines for future data handling
-        self.pdb = open(pdb_file, "r")
-        self.pdb = self.pdb.readlines()
+        # uses the cached copy of the file if it was fetched before, and
+        # otherwise downloads it into the cache
+        try:
+            self.atoms = fetch_pdb(self.pdb_label, self.cache)
+        except FetchError as error:
+            mb.showerror("Error", str(error))
+            return
+        except Exception as error:
+            # a downloaded file that cannot be parsed, or a cache that cannot
+            # be written to
+            mb.showerror("Error", "Could not read the PDB file!\n" + str(error))
+            return
+
+        self.pdb = self.atoms.data
+        self.dropdown()
 
         return self.pdb
 
     def explorer_file(self):
         '''
         Function will open a file explorer so the user can upload a PDB file of
-        their choosing. If the file does not end in PDB an error will pop up.
+        their choosing, which may be gzipped. If the file does not start with
+        HEADER an error will pop up.
 
         Parameters
         -------
@@ -457,28 +3010,39 @@ class Application(Frame):
 
         Returns
         -------
-        self.pdb: *file*
-            DESCRIPTION the PDB file that was uploaded.
+        self.pdb: *mmap*
+            DESCRIPTION the PDB file that was uploaded, mapped into memory.
 
         '''
 
         # opens a file explorer for the user
-        self.filename = filedialog.askopenfile(mode="r", initialdir="/",
-                                               filetypes=(
-                                                   ("All Files", "*.txt"), ("All Files", "*.*")),
-                                               title="Choose a file.")
-
-        # reads lines of the chosen file from the file explorer
-        self.pdb = self.filename.read().splitlines()
-
-       # if the file starts with the HEADER phrase then the next screen will come up
-        if self.pdb[0].startswith("HEADER"):
-            self.pdb_label = self.pdb[0][62:66]
-            self.dropdown()
-            return self.pdb
-        # If it does not have the HEADER then an error is prompted
-        else:
-            mb.showerror("Error", "Not a PDB file!")
+        self.filename = filedialog.askopenfilename(initialdir="/",
+                                                   filetypes=(
+                                                       ("All Files", "*.txt"), ("All Files", "*.*"),
+                                                       ("Gzipped Files", "*.gz")),
+                                                   title="Choose a file.")
+        if not self.filename:
+            return
+
+        # maps the chosen file into memory instead of reading it into lines,
+        # or decompresses it if it is gzipped, a damaged file or one that
+        # cannot be parsed brings up an error instead
+        try:
+            self.pdb = open_pdb(self.filename)
+
+            # if the file starts with the HEADER phrase then the next screen will come up
+            if self.pdb[:6] != b"HEADER":
+                mb.showerror("Error", "Not a PDB file!")
+                return
+            self.pdb_label = self.pdb[62:66].decode()
+            # the atom table comes from the sidecar next to the file if the
+            # file was opened before
+            self.atoms = load_pdb(self.filename, buffer=self.pdb)
+        except Exception as error:
+            mb.showerror("Error", "Could not read the PDB file!\n" + str(error))
+            return
+        self.dropdown()
+        return self.pdb
 
     def second_setup(self):
         '''
@@ -494,9 +3058,11 @@ class Application(Frame):
         None.
 
         '''
-        # destroy old window
+        # destroy old window, stopping the gif that is placed over it
         try:
             self.thirdWindow.destroy()
+            self.gif.unload()
+            self.gif.destroy()
         except AttributeError:
             self.canvas.destroy()
 
@@ -543,111 +3109,10 @@ class Application(Frame):
                                                         anchor="nw",
                                                         window=self.browse)
 
-    def get_coordinates(self, line):
-        '''
-        Function to take in a line from the PDB file and return the xyz coordinates
-        in float form.
-
-        Parameters
-        ----------
-        line : *str*
-            String of chracaters from the PDB file.
-
-        Returns
-        -------
-        [x, y, z]: *list*
-            List of xyz coordinates for a atom.
-
-        '''
-        x = float(line[31:38])
-        y = float(line[39:46])
-        z = float(line[47:54])
-        return [x, y, z]
-
-    def calc_atom_dist(self, atom1_xyz, atom2_xyz):
-        '''
-        Function to calculate the distance between two atoms based on their xyz coordinates.
-
-
-        Parameters
-        ----------
-        atom1_xyz : *list, float*
-            A series of numbers pertaining to the xyz coordinates of an atom.
-        atom2_xyz : *list, float*
-            A series of numbers pertaining to the xyz coordinates of an atom..
-
-        Returns
-        -------
-        dist : *float*
-            The distance between two atoms in angstroms.
-
-        '''
-        atom1_x, atom1_y, atom1_z = atom1_xyz
-        atom2_x, atom2_y, atom2_z = atom2_xyz
-
-        dist = math.sqrt((atom1_x - atom2_x)**2 + (atom1_y - atom2_y)**2 +
-                         (atom1_z - atom2_z)**2)
-        return dist
-
-    def h_bond(self, file):
-        '''
-        Function to calculate the hydrogen bond partners in a given PDB file.
-        Function will parse out all atoms ending in either O (oxygen) or N (nitrogen).
-        File will then open calculate the distance between every oxygen atom and nitrogen
-        atom and if the distance is less than or equal to 3.2 angstroms then the atoms
-        will be declared hydrogen bond partners and written to a text file.
-
-        Parameters
-        ----------
-        file: *txt file*
-            The pdb file that was obtained by fetching the internet or through the 
-            file explorer in readlines() mode.
-
-        Returns
-        -------
-        None
-        '''
-        # creates empty lists for all oxygen, nitrogen, and final hydrogen bonded atoms
-        oxygen = []
-        h_bonds = []
-        nitrogen = []
-        count = 1
-
-        # parses out the oxygen and nitrogen atoms in the pdb file
-        for line in self.pdb:
-            if line[:4] == "ATOM" and line[13:14] == "O":
-                oxygen.append(line.strip())
-            if line[:4] == "ATOM" and line[13:14] == "N":
-                nitrogen.append(line.strip())
-
-        # opens output text file
-        self.h_label = "H_bond_" + self.pdb_label + ".txt"
-        self.h_file = open(self.h_label, "w")
-
-        # gets coordinates for every oxygen and nitrogen atom in the lists
-        # if the distance is less than or equl to 3.2 the wo atoms are added to the out
-        # put text file and the counter is updated
-        for i in range(len(oxygen)):
-            o_atoms = self.get_coordinates(oxygen[i])
-            for w in range(len(nitrogen)):
-                n_atoms = self.get_coordinates(nitrogen[w])
-                h_bond_distance = self.calc_atom_dist(o_atoms, n_atoms)
-                if h_bond_distance <= 3.2:
-                    entry = str("Pair #" + str(count) + '\n' +
-                                oxygen[i]+'\n' + nitrogen[w]+'\n')
-                    self.h_file.write(entry)
-                    count += 1
-        self.h_file.close()
-
-    def radius(self, file):
+    def calculate_task(self):
         '''
-        Function to generate the center of mass and radius of gyration of a given protein.
-
-        Parameters
-        ----------
-        file: *txt file*
-            The pdb file that was obtained by fetching the internet or through the 
-            file explorer in readlines() mode..
+        Function that will perform a new function based on what option
+        was clicked from the dropdown menu.
 
         Returns
         -------
@@ -655,340 +3120,123 @@ class Application(Frame):
 
         '''
 
-        # creates empty lists for xyz coordinates, unprocessed atoms and final atom distance
-        x_coordinates = []
-        y_coordinates = []
-        z_coordinates = []
-        raw_atoms = []
-        atom_distance = []
-
-        # parses out the atoms with carbon alpha atoms to simplify the center of mass calculations
-        for line in self.pdb:
-            if line[:4] == "ATOM" and line[13:15] == "CA":
-                x_coordinates.append(float(line[31:38]))
-                y_coordinates.append(float(line[39:46]))
-                z_coordinates.append(float(line[47:54]))
-                raw_atoms.append(line.strip())
-
-        # calculates the center of mass of a protein based on xyz coordinates
-        self.center_of_mass = (mean(x_coordinates), mean(
-            y_coordinates), mean(z_coordinates))
-
-        # calculates the distance every atom has in relation to the center of mass
-        # if the atom is not the center of mass then it is added to an atom distance list
-        for i in range(len(raw_atoms)):
-            atom1_xyz = self.get_coordinates(raw_atoms[i])
-            atom2_xyz = self.center_of_mass
-            atom_dist = self.calc_atom_dist(atom1_xyz, atom2_xyz)
-            if atom_dist > 0:
-                atom_distance.append(atom_dist)
-
-        # radius of gyration calculated based on the total atom distances from the center of
-        # mass divided by the amount of atoms in the molecule
-
-        self.radius_gyration = sum(atom_distance) / len(raw_atoms)
-
-        self.output_text = str("Center of Mass = " + str(self.center_of_mass
-                                                         ) + '\n' + "Radius of Gyration = " + str(
-                                                             str(self.radius_gyration) + "Å"))
-
-    def hydropathy(self, file):
+        # nothing happens until a task is chosen or while a task is running
+        if self.clicked.get() not in self.options or self.task_thread is not None:
+            return
+
+        # runs the task that was chosen in a worker thread, so the window
+        # keeps redrawing, and shows a progress bar and cancel button
+        task = Analysis.tasks[self.options.index(self.clicked.get())]
+        self.fraction = 0.0
+        self.cancel_event = threading.Event()
+        self.task_result = None
+        self.task_thread = threading.Thread(target=self.task_worker, args=(task,),
+                                            daemon=True)
+
+        self.calculate.config(state=DISABLED)
+        self.back.config(state=DISABLED)
+        self.drop.config(state=DISABLED)
+        self.progress_bar = ttk.Progressbar(self, length=300, maximum=1.0)
+        self.progress_c = self.thirdWindow.create_window(230, 390, anchor="nw",
+                                                         window=self.progress_bar)
+        self.cancel = Button(self, text="Cancel", width=10,
+                             command=self.cancel_event.set)
+        self.cancel_c = self.thirdWindow.create_window(460, 350, anchor="nw",
+                                                       window=self.cancel)
+
+        self.task_thread.start()
+        self.after(100, self.check_task, task)
+
+    def task_worker(self, task):
         '''
-        Function to calculate the hydrophobicity of a given protein in
-        terms of the octanol and interface scale developed by Wimley and White, 1996.
-        Function will graph the hydrophobicity in the different scales in a sliding 
-        window to show how the hydrophobicity of a region changes.
-
-        Parameters
-        ----------
-        file: *txt file*
-            The pdb file that was obtained by fetching the internet or through the 
-            file explorer in readlines() mode.
-
-        Returns
-        -------
-        None.
-
+        Function run in the worker thread. It runs the task and keeps the
+        summary message, or the error that stopped it, for check_task.
         '''
-        self.hydro_label = self.pdb_label
-        # dictionary for the conversion of amino acids to FASTA format
-        fasta = []
-        aminoacid = {}
-        aminoacid["ALA"] = "A"
-        aminoacid["CYS"] = "C"
-        aminoacid["ASP"] = "D"
-        aminoacid["GLU"] = "E"
-        aminoacid["PHE"] = "F"
-        aminoacid["GLY"] = "G"
-        aminoacid["HIS"] = "H"
-        aminoacid["ILE"] = "I"
-        aminoacid["LYS"] = "K"
-        aminoacid["LEU"] = "L"
-        aminoacid["MET"] = "M"
-        aminoacid["MSE"] = "M"
-        aminoacid["ASN"] = "N"
-        aminoacid["PRO"] = "P"
-        aminoacid["GLN"] = "Q"
-        aminoacid["ARG"] = "R"
-        aminoacid["SER"] = "S"
-        aminoacid["THR"] = "T"
-        aminoacid["VAL"] = "V"
-        aminoacid["TRP"] = "W"
-        aminoacid["UNK"] = "X"
-        aminoacid["TYR"] = "Y"
-
-        # parses out all carbon alpha atoms for simplicity
-        # if the residue is in the amino acid list, it will be converted
-        # to a fasta format and saved to fasta list
-        for line in self.pdb:
-            if line[:4] == "ATOM" and line[13:15] == "CA":
-                if line[17:20] in aminoacid:
-                    fasta.append(aminoacid[line[17:20]].strip())
-
-        # dictionary with the octanol values for every fasta amino acid
-        octanol = []
-        octscale = {}
-        octscale["A"] = "0.5"
-        octscale["R"] = "1.81"
-        octscale["N"] = "0.85"
-        octscale["D"] = "3.64"
-        octscale["C"] = "-0.02"
-        octscale["Q"] = "0.77"
-        octscale["E"] = "3.63"
-        octscale["G"] = "1.15"
-        octscale["H"] = "2.33"
-        octscale["I"] = "-1.12"
-        octscale["L"] = "-1.25"
-        octscale["M"] = "-0.67"
-        octscale["F"] = "-1.71"
-        octscale["P"] = "0.14"
-        octscale["S"] = "0.46"
-        octscale["T"] = "0.25"
-        octscale["W"] = "-2.09"
-        octscale["Y"] = "-0.71"
-        octscale["V"] = "-0.46"
-
-        # dictionary with the interface values for every fasta amino acid
-        interface = []
-        intscale = {}
-        intscale["A"] = "0.17"
-        intscale["R"] = "0.81"
-        intscale["N"] = "0.42"
-        intscale["D"] = "1.23"
-        intscale["C"] = "-0.24"
-        intscale["Q"] = "0.58"
-        intscale["E"] = "2.02"
-        intscale["G"] = "0.01"
-        intscale["H"] = "0.96"
-        intscale["I"] = "-0.31"
-        intscale["L"] = "-0.56"
-        intscale["M"] = "-0.23"
-        intscale["F"] = "-1.13"
-        intscale["P"] = "0.45"
-        intscale["S"] = "0.13"
-        intscale["T"] = "0.14"
-        intscale["W"] = "-1.85"
-        intscale["Y"] = "-0.94"
-        intscale["V"] = "-0.07"
-
-        # iterates thrugh fasta list and if the letter is in the octscale and intscale
-        # dictionary then the values are recorded in the appropriate list
-        for letter in fasta:
-            if letter in octscale and intscale:
-                octanol.append(float(octscale[letter].strip()))
-                interface.append(float(intscale[letter].strip()))
-
-        average_octanol = []
-        average_int = []
-        # calculates the average octanol value for a 19 window of residues
-        for i in range(9, len(octanol)-10):
-            average_octscale = mean(octanol[i-9:i+9])
-            average_octanol.append(average_octscale)
-
-        # calculates the average interface value for a 19 window of residues
-        for i in range(9, len(interface)-10):
-            average_intscale = mean(interface[i-9:i+9])
-            average_int.append(average_intscale)
-
-        # creates numpy arrays for the average octanol and interface lists
-        # graphs the scale and saves it to the working directory
-        average_octanol_np = np.array(average_octanol)
-        average_interface_np = np.array(average_int)
-        average_scale = average_octanol_np - average_interface_np
-        xaxis = np.arange(10, len(average_interface_np)+10)
-        plt.figure(figsize=(8, 6))
-        plt.plot(xaxis, average_octanol_np, 'r-', label="Octanol Scale")
-        plt.plot(xaxis, average_interface_np, 'b:', label="Interface Scale")
-        plt.plot(xaxis, average_scale, 'g--', label="Octanol-Interface Scale")
-        plt.ylabel("Total free energy (kcal/mol)", fontsize=16)
-        plt.xlabel("Residue Number in 19 AA Window", fontsize=16)
-        plt.title("Hydrophobicity Scale of " + self.hydro_label)
-        plt.legend()
-        plt.savefig("Hydrophobicity_Scale_" + self.hydro_label + ".png")
-        plt.close()
-        self.fig = PhotoImage(
-            file="Hydrophobicity_Scale_" + self.hydro_label + ".png")
+        try:
+            self.task_result = self.run_task(task)
+        except TaskCancelled as cancelled:
+            self.task_result = cancelled
+        except Exception as error:
+            self.task_result = error
 
-    def ss(self, file):
+    def check_task(self, task):
         '''
-        Will take in a pdb file and parse the data set to return a list of secondary
-        structures in the protein.
+        Function that polls the worker thread from the Tk main loop. It moves
+        the progress bar while the task runs and shows the result once it is
+        done.
 
         Parameters
         ----------
-        file: *txt file*
-            The pdb file that was obtained by fetching the internet or through the 
-            file explorer in readlines() mode.
-
-        Returns
-        -------
-        None.
-
-        '''
-        self.sf_label = "secondary_structure_" + self.pdb_label + ".txt"
-
-        self.sf = open(self.sf_label, "a")
-
-        ss = []
-
-        for line in self.pdb:
-            if line[:5] == "HELIX":
-                ss.append(line)
-            if line[:5] == "SHEET":
-                ss.append(line)
-
-        helix = 1
-        sheet = 1
-        for entry in ss:
-            if entry.startswith('HELIX'):
-                self.sf.write(str(entry) + '\n')
-                helix += 1
-            if entry.startswith('SHEET'):
-                self.sf.write(str(entry) + '\n')
-                sheet += 1
-
-        self.out_entry = str("There are " + str(helix) + " alpha helices and " +
-                             str(sheet) + " beta sheets! \nFull file saved as " + self.sf_label)
-        self.sf.close()
-
-    def close(self, file):
-
-        pdb_line = [i for i in self.pdb if i[:4] == "ATOM"]
-
-        self.cc_label = "Close_contacts_" + self.pdb_label + ".txt"
-
-        self.close_contacts = open(self.cc_label, "w")
-        count = 0
-        # Ignoring molecules on the same residue
-        for i in range(len(pdb_line)):
-            for j in range(i+1, len(pdb_line)):
-                if pdb_line[i][17:26] != pdb_line[j][17:26]:
-                    atom1_xyz = self.get_coordinates(pdb_line[i])
-                    atom2_xyz = self.get_coordinates(pdb_line[j])
-                    atom_dist = self.calc_atom_dist(atom1_xyz, atom2_xyz)
-                    if atom_dist <= 2.7:
-                        entry = str("Pair #" + str(count) + '\n' +
-                                    pdb_line[i]+'\n' + pdb_line[j]+'\n')
-                        self.close_contacts.write(entry)
-                        count += 1
-        self.out_msg = str("There are " + str(count) + " van der Waals contacts!" +
-                           '\nFull details saved as ' + self.cc_label)
-
-        self.close_contacts.close()
-
-    def disulfide(self, file):
-
-        pdb_line = [i for i in self.pdb if i[:4] ==
-                    "ATOM" and i[17:20] == "CYS" and i[13:15] == "SG"]
-
-        self.ds_label = "Disulfide_bonds_" + self.pdb_label + ".txt"
-
-        disulfide_txt = open(self.ds_label, "w")
-
-        count = 0
-
-        for i in range(len(pdb_line)):
-            for j in range(i+1, len(pdb_line)):
-                if pdb_line[i][17:26] != pdb_line[j][17:26]:
-                    atom1_xyz = self.get_coordinates(pdb_line[i])
-                    atom2_xyz = self.get_coordinates(pdb_line[j])
-                    atom_dist = self.calc_atom_dist(atom1_xyz, atom2_xyz)
-                    if atom_dist <= 5:
-                        entry = str("Pair #" + str(count) + '\n' +
-                                    pdb_line[i]+'\n' + pdb_line[j]+'\n')
-                        disulfide_txt.write(entry)
-                        count += 1
-        if count == 0:
-            if os.path.isfile(self.ds_label):
-                disulfide_txt.close()
-                os.remove(self.ds_label)
-                self.out_msg = str(
-                    "There are no disulfide bonds in this protein!")
-                mb.showerror("Error", self.out_msg)
-
-        if count >= 1:
-            self.out_msg = str("There are " + str(count) + " disulfide bonds!" +
-                               '\nFull details saved as ' + self.ds_label)
-            mb.showinfo("Success!", self.out_msg)
-            disulfide_txt.close()
-
-    def calculate_task(self):
-        '''
-        Function that will perform a new function based on what option
-        was clicked from the dropdown menu.
+        task : *str*
+            Name of the running task.
 
         Returns
         -------
         None.
 
         '''
-
-        # hydrogen bond function
-        # will output success message after it is completed
-        if self.clicked.get() == self.options[0]:
-            self.h_bond(self.pdb)
-            mb.showinfo(
-                "Success!", "File saved in directory as " + self.h_label)
-
-        # radius of gyration function
-        # will output summary of calculations after it is completed
-        if self.clicked.get() == self.options[1]:
-            self.radius(self.pdb)
-            mb.showinfo("Success!", self.output_text)
+        if self.task_thread.is_alive():
+            self.progress_bar["value"] = self.fraction
+            self.after(100, self.check_task, task)
+            return
+
+        # removes the progress bar and cancel button again
+        self.task_thread = None
+        self.progress_bar.destroy()
+        self.cancel.destroy()
+        self.calculate.config(state=NORMAL)
+        self.back.config(state=NORMAL)
+        self.drop.config(state=NORMAL)
+        message = self.task_result
+
+        if isinstance(message, TaskCancelled):
+            mb.showinfo("Cancelled", "The calculation was cancelled.")
+            return
+        if isinstance(message, Exception):
+            mb.showerror("Error", "The calculation failed: " + str(message))
+            return
+
+        # disulfide bond function shows an error if there are no bonds
+        if task == "disulfide" and self.ds_count == 0:
+            mb.showerror("Error", message)
+        else:
+            mb.showinfo("Success!", message)
 
         # hydrophobicity scale function
-        # will output message stating where the graph is saved
         # will create popup window displaying the graph
-
-        if self.clicked.get() == self.options[2]:
-            self.hydropathy(self.pdb)
-            mb.showinfo(
-                "Success!", "Graph saved in directory as Hydrophobicity_Scale_" + self.hydro_label + ".png")
+        # the graph is shown straight from memory, and only written to disk
+        # if the user saves it
+        if task == "hydropathy":
+            self.fig = PhotoImage(data=base64.b64encode(self.hydro_png))
             self.tl = Toplevel()
-            self.tl.geometry('576x432')
+            self.tl.geometry('576x467')
             self.tl.title("Hydrophobicity Scale")
             self.hc = Canvas(self.tl, width=576, height=432)
             self.hc.pack()
             self.hc.create_image(0, 0, image=self.fig,
                                  anchor="nw")
+            self.save_graph = Button(self.tl, text="Save", width=10,
+                                     command=self.save_plot)
+            self.save_graph.pack()
 
-        # secondary structure funcion
-        # will output summary message after it is completed
-        if self.clicked.get() == self.options[3]:
-            self.ss(self.pdb)
-            mb.showinfo("Success!", self.out_entry)
+    def save_plot(self):
+        '''
+        Function to save the hydrophobicity graph shown in the popup window to
+        a PNG file the user chooses.
 
-        # close contacts function
-        # will output summary message
-        if self.clicked.get() == self.options[4]:
-            self.close(self.pdb)
-            mb.showinfo("Success!", self.out_msg)
+        Returns
+        -------
+        None.
+
+        '''
+        filename = filedialog.asksaveasfilename(
+            parent=self.tl, defaultextension=".png",
+            initialfile="Hydrophobicity_Scale_" + self.hydro_label + ".png",
+            filetypes=(("PNG Files", "*.png"),), title="Save the graph.")
+        if filename:
+            with open(filename, "wb") as f:
+                f.write(self.hydro_png)
 
-        # disulfide bond calculation function
-        if self.clicked.get() == self.options[5]:
-            self.disulfide(self.pdb)
-        
-        
     def dropdown(self):
         '''
         Function to create the third screen which contains the dropdown menu.
@@ -1053,12 +3301,452 @@ class Application(Frame):
                                                           anchor="nw",
                                                           window=self.back)
         # places a funny gif
-        lbl = ImageLabel(self)
-        lbl.place(x=150, y=130)
-        photo = lbl.load('calc.gif')
+        self.gif = ImageLabel(self)
+        self.gif.place(x=150, y=130)
+        self.gif.load('calc.gif')
+
+
+def structure_label(source):
+    '''
+    Function to find the label of a structure without loading it: the PDB ID
+    itself, or the ID in the HEADER record on the first line of a file, or
+    the file name if the file has none.
+
+    Parameters
+    ----------
+    source : *str*
+        Path of a PDB file, which may be gzipped, or a PDB ID.
+
+    Returns
+    -------
+    pdb_label : *str*
+        Label of the structure.
+
+    '''
+    if not os.path.isfile(source):
+        return source
+
+    # only the first line is read, which for a gzipped file is only the
+    # start of the stream
+    try:
+        with open(source, "rb") as f:
+            gzipped = f.read(2) == b"\x1f\x8b"
+        with (gzip.open(source) if gzipped else open(source, "rb")) as f:
+            header = f.readline(100).decode(errors="replace")
+    except (OSError, EOFError, zlib.error):
+        # the error is reported when the file is loaded
+        header = ""
+    if header.startswith("HEADER") and header[62:66].strip():
+        return header[62:66]
+    return os.path.basename(source).split(".")[0]
+
+
+def open_structure(source, cache=None):
+    '''
+    Function to load a structure for the command line from either a local
+    PDB file or a PDB ID.
+
+    Parameters
+    ----------
+    source : *str*
+        Path of a PDB file, which may be gzipped, or a PDB ID to fetch.
+    cache : *PDBCache*
+        Cache fetched files are looked up in and saved to.
+
+    Returns
+    -------
+    pdb_label : *str*
+        Label of the structure, see structure_label.
+    atoms : *AtomTable*
+        Atom table of the structure.
+
+    '''
+    if not os.path.isfile(source):
+        return source, fetch_pdb(source, cache or PDBCache())
+    return structure_label(source), load_pdb(source)
+
+
+def analyze(sources, tasks, cache=None, window=19, ca_only=False, domains=(),
+            disulfide_range=(2.0, 2.1)):
+    '''
+    Function to run tasks on structures without the GUI and print the summary
+    of every result.
+
+    Parameters
+    ----------
+    sources : *list, str*
+        Paths of PDB files or PDB IDs.
+    tasks : *list, str*
+        Names of the tasks to run, see Analysis.tasks.
+    cache : *PDBCache*
+        Cache fetched files are looked up in and saved to.
+    window : *int*
+        Number of residues in the sliding window of the hydropathy graph.
+    ca_only : *bool*
+        Whether the radius of gyration only uses the carbon alpha atoms.
+    domains : *list, tuple*
+        Domains the radius of gyration is also calculated for, see parse_domain.
+    disulfide_range : *tuple, float*
+        Shortest and longest SG-SG distance in angstroms of a disulfide bond.
+
+    Returns
+    -------
+    failed : *int*
+        Number of structures that could not be loaded or analyzed.
+
+    '''
+    failed = 0
+    for source in sources:
+        # one structure that cannot be loaded or analyzed does not stop the rest
+        try:
+            pdb_label, atoms = open_structure(source, cache)
+            analysis = Analysis(atoms, pdb_label, window, ca_only, domains,
+                                disulfide_range)
+            for task in tasks:
+                print(pdb_label + " " + task + ": " + analysis.run_task(task))
+        except Exception as error:
+            print(source + ": " + str(error), file=sys.stderr)
+            failed += 1
+    return failed
+
+
+def find_sources(sources):
+    '''
+    Function to expand directories in a list of sources into the PDB files
+    they contain (.pdb and .ent files, optionally gzipped).
+    PDB IDs and file paths are kept as they are.
+    '''
+    found = []
+    for source in sources:
+        if os.path.isdir(source):
+            found += sorted(os.path.join(source, name) for name in os.listdir(source)
+                            if name.endswith((".pdb", ".ent", ".pdb.gz", ".ent.gz")))
+        else:
+            found.append(source)
+    return found
+
+
+def analyze_structure(source, tasks, cache_dir=CACHE_DIR, window=19, ca_only=False,
+                      domains=(), disulfide_range=(2.0, 2.1), name=None):
+    '''
+    Function run by the batch worker processes. It loads one structure, runs
+    the tasks on it and returns one row of the summary table.
+
+    Parameters
+    ----------
+    source : *str*
+        Path of a PDB file or a PDB ID.
+    tasks : *list, str*
+        Names of the tasks to run, see Analysis.tasks.
+    cache_dir : *str*
+        Directory of the PDB file cache.
+    window : *int*
+        Number of residues in the sliding window of the hydropathy graph.
+    ca_only : *bool*
+        Whether the radius of gyration only uses the carbon alpha atoms.
+    domains : *list, tuple*
+        Domains the radius of gyration is also calculated for, see parse_domain.
+    disulfide_range : *tuple, float*
+        Shortest and longest SG-SG distance in angstroms of a disulfide bond.
+    name : *str*
+        Label used in the names of the output files instead of the label of
+        the structure.
+
+    Returns
+    -------
+    row : *dict*
+        Source, label, atom count and the summary columns of every task, or
+        the error if the structure could not be loaded or analyzed.
+
+    '''
+    # any error only loses the row of this structure, not the whole batch
+    try:
+        pdb_label, atoms = open_structure(source, PDBCache(cache_dir))
+        analysis = Analysis(atoms, name or pdb_label, window, ca_only, domains,
+                            disulfide_range)
+        row = {"source": source, "label": pdb_label, "atoms": len(atoms)}
+        for task in tasks:
+            analysis.run_task(task)
+            row.update(analysis.task_summary(task))
+    except Exception as error:
+        return {"source": source, "error": str(error)}
+    return row
+
+
+def batch(sources, tasks, workers=None, cache_dir=CACHE_DIR, output="batch_summary.tsv",
+          window=19, ca_only=False, domains=(), disulfide_range=(2.0, 2.1)):
+    '''
+    Function to run tasks over many structures at once with one worker process
+    per core, and write the results into a single tab separated summary
+    table. PDB IDs are first fetched into the cache together, so the workers
+    only read local files. The output files of structures with the same label
+    are numbered, for example H_bond_1ABC_1.txt and H_bond_1ABC_3.txt.
+    Labels come from structure_label, so nothing is loaded twice.
+
+    Parameters
+    ----------
+    sources : *list, str*
+        PDB IDs, paths of PDB files or directories of PDB files.
+    tasks : *list, str*
+        Names of the tasks to run, see Analysis.tasks.
+    workers : *int*
+        Number of worker processes, one per core by default.
+    cache_dir : *str*
+        Directory of the PDB file cache.
+    output : *str*
+        Path of the summary table.
+    window : *int*
+        Number of residues in the sliding window of the hydropathy graph.
+    ca_only : *bool*
+        Whether the radius of gyration only uses the carbon alpha atoms.
+    domains : *list, tuple*
+        Domains the radius of gyration is also calculated for, see parse_domain.
+    disulfide_range : *tuple, float*
+        Shortest and longest SG-SG distance in angstroms of a disulfide bond.
+
+    Returns
+    -------
+    rows : *list, dict*
+        One row of the summary table per structure, in the order given.
+
+    '''
+    sources = find_sources(sources)
+    pdb_ids = [source for source in sources if not os.path.isfile(source)]
+    errors = fetch_many(pdb_ids, PDBCache(cache_dir), load=False)[1]
+
+    rows = {source: {"source": source, "error": errors[source]}
+            for source in pdb_ids if source in errors}
+    todo = list(dict.fromkeys(source for source in sources if source not in rows))
+
+    # structures with the same label are numbered so the workers do not
+    # overwrite each other's output files
+    labels = [structure_label(source) for source in todo]
+    names, repeats = np.unique(labels, return_counts=True)
+    repeated = set(names[repeats > 1])
+    names = [label + "_" + str(i + 1) if label in repeated else label
+             for i, label in enumerate(labels)]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for source, row in zip(todo, pool.map(analyze_structure, todo,
+                                              [tasks] * len(todo),
+                                              [cache_dir] * len(todo),
+                                              [window] * len(todo),
+                                              [ca_only] * len(todo),
+                                              [domains] * len(todo),
+                                              [disulfide_range] * len(todo),
+                                              names)):
+            rows[source] = row
+    rows = [rows[source] for source in sources]
+
+    # every column that any row has, in the order they first appear
+    columns = list(dict.fromkeys(column for row in rows for column in row
+                                 if column != "error")) + ["error"]
+    with open(output, "w") as f:
+        f.write("\t".join(columns) + "\n")
+        for row in rows:
+            f.write("\t".join(str(row.get(column, "")) for column in columns) + "\n")
+    return rows
+
+
+def load_hydropathy(source, cache_dir=CACHE_DIR):
+    '''
+    Function run by the batch worker processes. It loads one structure and
+    returns the octanol and interface scale values of its residues, or the
+    error if the structure could not be loaded or read.
+    '''
+    try:
+        pdb_label, atoms = open_structure(source, PDBCache(cache_dir))
+        return source, pdb_label, residue_hydropathy(atoms)
+    except Exception as error:
+        return source, None, str(error)
+
+
+def save_hydropathy_plot(label, octanol, interface, window, directory="."):
+    '''
+    Function run by the batch worker processes to save the hydrophobicity
+    graph of one profile of batch_hydropathy, without its NaN padding.
+    '''
+    count = np.count_nonzero(~np.isnan(octanol))
+    xaxis = np.arange(count) + (window + 1) / 2
+    filename = os.path.join(directory, "Hydrophobicity_Scale_" + label + ".png")
+    with open(filename, "wb") as f:
+        f.write(plot_hydropathy(xaxis, octanol[:count], interface[:count], label, window))
+    return filename
+
+
+def batch_hydropathy(sources, window=19, workers=None, cache_dir=CACHE_DIR,
+                     output="hydropathy_profiles.npz", plots=None):
+    '''
+    Function to compute the hydropathy profiles of many structures at once.
+    The structures are loaded in worker processes, the profiles of all of
+    them are computed together as padded 2-D arrays and saved in a single
+    .npz file with one array per column.
+
+    Parameters
+    ----------
+    sources : *list, str*
+        PDB IDs, paths of PDB files or directories of PDB files.
+    window : *int*
+        Number of residues in the sliding window.
+    workers : *int*
+        Number of worker processes, one per core by default.
+    cache_dir : *str*
+        Directory of the PDB file cache.
+    output : *str*
+        Path of the .npz file with the arrays source, label, residues,
+        windows, octanol, interface and scale, and the window length.
+    plots : *str*
+        Directory to save a graph of every profile in, drawn by the worker
+        processes, or None to skip the graphs.
+
+    Returns
+    -------
+    profiles : *dict*
+        The arrays saved in the output file.
+    errors : *dict*
+        Error message of every source that could not be loaded.
+
+    '''
+    sources = find_sources(sources)
+    pdb_ids = [source for source in sources if not os.path.isfile(source)]
+    errors = fetch_many(pdb_ids, PDBCache(cache_dir), load=False)[1]
+    todo = [source for source in sources if source not in errors]
+
+    loaded = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for source, pdb_label, values in pool.map(load_hydropathy, todo,
+                                                  [cache_dir] * len(todo)):
+            if pdb_label is None:
+                errors[source] = values
+            else:
+                loaded.append((source, pdb_label, values))
+
+        octanol, counts = hydropathy_profiles([values[0] for source, label, values in loaded],
+                                              window)
+        interface, counts = hydropathy_profiles([values[1] for source, label, values in loaded],
+                                                window)
+        profiles = {"source": np.array([source for source, label, values in loaded], dtype=str),
+                    "label": np.array([label for source, label, values in loaded], dtype=str),
+                    "residues": np.array([len(values[0]) for source, label, values in loaded],
+                                         dtype=np.int64),
+                    "windows": counts,
+                    "octanol": octanol,
+                    "interface": interface,
+                    "scale": octanol - interface,
+                    "window": np.array(window)}
+        np.savez(output, **profiles)
+
+        # the graphs are drawn by the workers as well, numbered when several
+        # structures have the same label so none is overwritten
+        if plots is not None:
+            os.makedirs(plots, exist_ok=True)
+            labels, repeats = np.unique(profiles["label"], return_counts=True)
+            repeated = set(labels[repeats > 1])
+            names = [label + "_" + str(i + 1) if label in repeated else label
+                     for i, label in enumerate(profiles["label"])]
+            list(pool.map(save_hydropathy_plot, names, octanol, interface,
+                          [window] * len(loaded), [plots] * len(loaded)))
+    return profiles, errors
+
+
+def main(argv=None):
+    '''
+    Function to start the GUI, or run the analyze command on a display-less
+    machine, for example
+
+    $ python3 main.py analyze 1ABC my_protein.pdb --task hbond,close
+    '''
+    parser = argparse.ArgumentParser(description="PDB Processing Program")
+    commands = parser.add_subparsers(dest="command")
+    command = commands.add_parser("analyze", help="run tasks without the GUI")
+    command.add_argument("sources", nargs="+",
+                         help="PDB IDs to fetch or paths of PDB files")
+    command.add_argument("--task", default=",".join(Analysis.tasks),
+                         help="comma separated tasks out of " + ", ".join(Analysis.tasks))
+    command.add_argument("--cache", default=CACHE_DIR,
+                         help="directory of the PDB file cache")
+    command.add_argument("--window", type=int, default=19,
+                         help="residues in the sliding window of the hydropathy graph")
+    command.add_argument("--ca-only", action="store_true",
+                         help="only use carbon alpha atoms for the radius of gyration")
+    command.add_argument("--domain", type=parse_domain, action="append", default=[],
+                         help="residue range like A:1-120 to also calculate the radius "
+                         "of gyration of, can be given several times")
+    command.add_argument("--disulfide-range", type=parse_range, default=(2.0, 2.1),
+                         help="shortest and longest SG-SG distance of a disulfide bond "
+                         "in angstroms, like 2.0,2.1")
+    command = commands.add_parser("batch", help="run tasks over many structures "
+                                  "in parallel and write one summary table")
+    command.add_argument("sources", nargs="+",
+                         help="PDB IDs to fetch, paths of PDB files or directories")
+    command.add_argument("--task", default=",".join(Analysis.tasks),
+                         help="comma separated tasks out of " + ", ".join(Analysis.tasks))
+    command.add_argument("--cache", default=CACHE_DIR,
+                         help="directory of the PDB file cache")
+    command.add_argument("--window", type=int, default=19,
+                         help="residues in the sliding window of the hydropathy graph")
+    command.add_argument("--ca-only", action="store_true",
+                         help="only use carbon alpha atoms for the radius of gyration")
+    command.add_argument("--domain", type=parse_domain, action="append", default=[],
+                         help="residue range like A:1-120 to also calculate the radius "
+                         "of gyration of, can be given several times")
+    command.add_argument("--disulfide-range", type=parse_range, default=(2.0, 2.1),
+                         help="shortest and longest SG-SG distance of a disulfide bond "
+                         "in angstroms, like 2.0,2.1")
+    command.add_argument("--workers", type=int, default=None,
+                         help="number of worker processes, one per core by default")
+    command.add_argument("--output", default="batch_summary.tsv",
+                         help="path of the summary table")
+    command = commands.add_parser("hydropathy", help="compute the hydropathy profiles "
+                                  "of many structures into one file")
+    command.add_argument("sources", nargs="+",
+                         help="PDB IDs to fetch, paths of PDB files or directories")
+    command.add_argument("--cache", default=CACHE_DIR,
+                         help="directory of the PDB file cache")
+    command.add_argument("--window", type=int, default=19,
+                         help="residues in the sliding window")
+    command.add_argument("--workers", type=int, default=None,
+                         help="number of worker processes, one per core by default")
+    command.add_argument("--output", default="hydropathy_profiles.npz",
+                         help="path of the .npz file of profiles")
+    command.add_argument("--plots", default=None,
+                         help="directory to also save a graph of every profile in")
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        if Tk is None:
+            parser.error("the GUI needs tkinter, run a command such as analyze instead")
+        global root
+        root = Tk()
+        app = Application(master=root)
+        app.mainloop()
+        return 0
+
+    if args.window < 1:
+        parser.error("the window needs at least one residue")
+    if args.command == "hydropathy":
+        profiles, errors = batch_hydropathy(args.sources, args.window, args.workers,
+                                            args.cache, args.output, args.plots)
+        for source, error in errors.items():
+            print(source + ": " + error, file=sys.stderr)
+        print("Saved " + str(len(profiles["label"])) + " hydropathy profiles as " +
+              args.output)
+        return 1 if errors else 0
+
+    tasks = [task.strip() for task in args.task.split(",") if task.strip()]
+    for task in tasks:
+        if task not in Analysis.tasks:
+            parser.error("unknown task " + task)
+    if args.command == "batch":
+        rows = batch(args.sources, tasks, args.workers, args.cache, args.output,
+                     args.window, args.ca_only, args.domain, args.disulfide_range)
+        failed = sum(1 for row in rows if "error" in row)
+        print("Analyzed " + str(len(rows) - failed) + " of " + str(len(rows)) +
+              " structures, summary saved as " + args.output)
+        return 1 if failed else 0
+    return 1 if analyze(args.sources, tasks, PDBCache(args.cache), args.window,
+                        args.ca_only, args.domain, args.disulfide_range) else 0
 
 
 if __name__ == "__main__":
-    app = Application(master=root)
-    app.mainloop()
+    sys.exit(main())
 